@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence, Tuple
+
+
+CompletionRequest = Tuple[int, int]  # (assignment_id, user_id)
+
+_STOP = object()
+
+
+class CompletionBatcher:
+    # Write-behind queue for completion taps. Requests that arrive within
+    # `window` seconds of the first one are applied in a single transaction, so
+    # a burst of taps costs one commit, and one fsync of the WAL under
+    # synchronous=FULL, instead of one per tap. Futures resolve only after
+    # that commit.
+
+    def __init__(
+        self,
+        apply: Callable[[Sequence[CompletionRequest]], List],
+        *,
+        window: float = 0.005,
+        max_batch: int = 64,
+    ):
+        if window < 0:
+            raise ValueError("window must not be negative")
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._apply = apply
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, assignment_id: int, user_id: int) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Completion batcher is closed")
+            self._queue.put((assignment_id, user_id, future))
+        return future
+
+    def close(self) -> None:
+        # Everything submitted before close is still committed: the stop marker
+        # queues behind it.
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:  # window is over, but take whatever is already queued
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch) -> None:
+        try:
+            results = self._apply([(assignment_id, user_id) for assignment_id, user_id, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][2].set_exception(exc)
+                return
+            # isolate the failing request: everyone else still gets committed
+            for item in batch:
+                self._flush([item])
+            return
+        self.batches += 1
+        self.requests += len(batch)
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
-import asyncio
 from pathlib import Path
 
 from telegram.ext import Application
 
-from .config import load_config
+from .cache import DayAssignmentCache
+from .config import household_config, load_config
 from .data_loaders import load_tasks, load_users
 from .database import Database
-from .dispatcher import AppContext, register_handlers, setup_bot_commands
+from .dispatcher import AppContext, load_task_messages, register_handlers, setup_bot_commands
 from .rotation import (
     LEVEL_DAILY,
     LEVEL_EXTENDED,
@@ -18,6 +18,9 @@ from .rotation import (
     ensure_level_available,
 )
 from .scheduler import BotScheduler
+from .storage import AsyncDatabase
+from .tenancy import Tenants
+from .webhook import webhook_options
 
 
 DEFAULT_CONFIG_PATH = Path("cleaning_bot/config.yaml")
@@ -25,28 +28,49 @@ DEFAULT_CONFIG_PATH = Path("cleaning_bot/config.yaml")
 
 def build_application(config_path: Path | str = DEFAULT_CONFIG_PATH) -> Application:
     cfg = load_config(config_path)
-    tasks = load_tasks(cfg.files.tasks)
-    users = load_users(cfg.files.users)
-    database = Database(cfg.database.path)
-    database.sync_users(users)
-
-    for level in [
-        LEVEL_DAILY,
-        LEVEL_LIGHT,
-        LEVEL_REGULAR,
-        LEVEL_EXTENDED,
-        LEVEL_GENERAL,
-    ]:
-        ensure_level_available(tasks, level)
+    households = []
+    for household in cfg.households:
+        users = load_users(household.users, household.id)
+        households.append((household, users, load_tasks(household.tasks)))
+    database = Database(
+        cfg.database.path,
+        readers=cfg.database.reader_pool_size,
+        statement_cache_size=cfg.database.statement_cache_size,
+        cache=DayAssignmentCache(
+            max_days=cfg.database.cache_days,
+            max_age=cfg.database.cache_ttl_seconds,
+        ),
+        completion_batch_window=(
+            cfg.database.completion_batch_ms / 1000
+            if cfg.database.completion_batch_ms > 0
+            else None
+        ),
+    )
+    database.sync_users(user for _, users, _ in households for user in users)
+    for _, _, tasks in households:
+        database.sync_task_catalog(tasks)
+
+        for level in [
+            LEVEL_DAILY,
+            LEVEL_LIGHT,
+            LEVEL_REGULAR,
+            LEVEL_EXTENDED,
+            LEVEL_GENERAL,
+        ]:
+            ensure_level_available(tasks, level)
 
     scheduler = BotScheduler(cfg.scheduler)
 
     async def on_start(app: Application) -> None:
         await setup_bot_commands(app)
+        await load_task_messages(app)
         scheduler.start(app)
 
     async def on_shutdown(app: Application) -> None:  # pragma: no cover - cleanup
         scheduler.shutdown()
+        storage.close()
+        # commits completions still waiting in the group-commit queue
+        database.close()
 
     application = (
         Application.builder()
@@ -56,15 +80,31 @@ def build_application(config_path: Path | str = DEFAULT_CONFIG_PATH) -> Applicat
         .build()
     )
 
-    ctx = AppContext(config=cfg, db=database, users=users, tasks=tasks)
-    register_handlers(application, ctx)
+    storage = AsyncDatabase(database, readers=cfg.database.reader_pool_size)
+    # one context per household over the shared database, caches and queues
+    contexts = [
+        AppContext(
+            config=household_config(cfg, household),
+            db=database,
+            users=users,
+            tasks=tasks,
+            storage=storage,
+            household=household.id,
+        )
+        for household, users, tasks in households
+    ]
+    register_handlers(application, contexts[0], tenants=Tenants.build(contexts))
 
     return application
 
 
 def main() -> None:
     application = build_application()
-    application.run_polling()
+    webhook = application.bot_data["app_context"].config.webhook
+    if webhook.enabled:
+        application.run_webhook(**webhook_options(webhook))
+    else:
+        application.run_polling()
 
 
 if __name__ == "__main__":
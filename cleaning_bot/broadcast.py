@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_BROADCAST_CONCURRENCY = 8
+# finished broadcasts kept in `progress`; running ones are never dropped
+PROGRESS_HISTORY = 64
+
+
+@dataclass
+class BroadcastSummary:
+    # Filled in while the broadcast runs, so it doubles as its progress.
+    name: str
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+    failures: List[Tuple[Any, BaseException]] = field(default_factory=list)
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+
+class BroadcastEngine:
+    # Runs one send per target with at most `concurrency` in flight. A failing
+    # target is logged and counted, the others carry on.
+
+    def __init__(self, *, concurrency: int = DEFAULT_BROADCAST_CONCURRENCY):
+        if concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        self.concurrency = concurrency
+        self.sent = 0
+        self.failed = 0
+        self.in_flight = 0
+        # running and recently finished broadcasts by name, oldest first
+        self.progress: Dict[str, BroadcastSummary] = {}
+
+    async def run(
+        self,
+        name: str,
+        targets: Iterable[T],
+        send: Callable[[T], Awaitable[Any]],
+        *,
+        concurrency: Optional[int] = None,
+    ) -> BroadcastSummary:
+        targets = list(targets)
+        summary = self.progress[name] = BroadcastSummary(name, len(targets))
+        pending = iter(targets)
+
+        async def worker() -> None:
+            # Workers pull from one iterator, so a large target list does not
+            # become a large number of waiting tasks.
+            for target in pending:
+                self.in_flight += 1
+                try:
+                    await send(target)
+                except Exception as exc:  # noqa: BLE001 - isolate failing targets
+                    logger.warning("Broadcast %s failed for %r", name, target, exc_info=exc)
+                    summary.failed += 1
+                    summary.failures.append((target, exc))
+                    self.failed += 1
+                else:
+                    summary.succeeded += 1
+                    self.sent += 1
+                finally:
+                    self.in_flight -= 1
+
+        workers = min(concurrency or self.concurrency, len(targets))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        summary.elapsed = time.perf_counter() - summary.started_at
+        self._trim_progress()
+        logger.info(
+            "Broadcast %s: %s of %s sent, %s failed in %.2fs",
+            name,
+            summary.succeeded,
+            summary.total,
+            summary.failed,
+            summary.elapsed,
+        )
+        return summary
+
+    def _trim_progress(self) -> None:
+        finished = [name for name, item in self.progress.items() if item.done == item.total]
+        for name in finished[: max(0, len(self.progress) - PROGRESS_HISTORY)]:
+            del self.progress[name]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover - typing helper
+    from .database import Assignment
+
+# A day of one household: Database uses (household, day).
+DayKey = Hashable
+
+
+def _household_of(day: DayKey) -> Hashable:
+    # Plain dates are one implicit household.
+    return day[0] if isinstance(day, tuple) else None
+
+
+@dataclass
+class _CachedDay:
+    loaded_at: float
+    assignments: List[Assignment]
+    by_user: Dict[int, List[Assignment]] = field(default_factory=dict)
+    positions: Dict[int, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        for index, assignment in enumerate(self.assignments):
+            self.by_user.setdefault(assignment.user_id, []).append(assignment)
+            self.positions[assignment.id] = index
+
+
+class DayAssignmentCache:
+    # Keeps whole days of assignments keyed by day, evicting the least
+    # recently used day of the same household once it holds more than
+    # max_days, and anything older than max_age seconds. Loads race
+    # with writes, so every load carries the generation it started at and is
+    # dropped if a write happened in between.
+
+    def __init__(
+        self,
+        *,
+        max_days: int = 3,
+        max_age: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_days <= 0:
+            raise ValueError("max_days must be positive")
+        self.max_days = max_days
+        self.max_age = max_age
+        self._clock = clock
+        self._days: "OrderedDict[DayKey, _CachedDay]" = OrderedDict()
+        self._day_by_assignment: Dict[int, DayKey] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get_day(self, day: DayKey) -> Optional[List[Assignment]]:
+        with self._lock:
+            cached = self._lookup(day)
+            return list(cached.assignments) if cached else None
+
+    def get_user(self, day: DayKey, user_id: int) -> Optional[List[Assignment]]:
+        with self._lock:
+            cached = self._lookup(day)
+            if cached is None:
+                return None
+            return list(cached.by_user.get(user_id, []))
+
+    def get_assignment(self, assignment_id: int) -> Optional[Assignment]:
+        with self._lock:
+            day = self._day_by_assignment.get(assignment_id)
+            cached = self._lookup(day) if day is not None else None
+            if cached is None:
+                return None
+            return cached.assignments[cached.positions[assignment_id]]
+
+    def put(self, day: DayKey, assignments: List[Assignment], generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._drop(day)
+            self._days[day] = _CachedDay(self._clock(), list(assignments))
+            for assignment in assignments:
+                self._day_by_assignment[assignment.id] = day
+            household = _household_of(day)
+            same = [key for key in self._days if _household_of(key) == household]
+            excess = len(same) - self.max_days
+            if excess > 0:
+                for key in same[:excess]:
+                    self._drop(key)
+
+    def mark_completed(self, assignment_id: int, completed_at: datetime) -> None:
+        with self._lock:
+            self._generation += 1
+            day = self._day_by_assignment.get(assignment_id)
+            cached = self._days.get(day) if day is not None else None
+            if cached is None:
+                return
+            index = cached.positions[assignment_id]
+            updated = replace(cached.assignments[index], completed=True, completed_at=completed_at)
+            cached.assignments[index] = updated
+            user_list = cached.by_user[updated.user_id]
+            for position, item in enumerate(user_list):
+                if item.id == assignment_id:
+                    user_list[position] = updated
+                    break
+
+    def invalidate(self, day: Optional[DayKey] = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if day is None:
+                self._days.clear()
+                self._day_by_assignment.clear()
+            else:
+                self._drop(day)
+
+    def _lookup(self, day: DayKey) -> Optional[_CachedDay]:
+        cached = self._days.get(day)
+        if cached is None:
+            return None
+        if self._clock() - cached.loaded_at > self.max_age:
+            self._drop(day)
+            return None
+        self._days.move_to_end(day)
+        return cached
+
+    def _drop(self, day: DayKey) -> None:
+        cached = self._days.pop(day, None)
+        if cached is None:
+            return
+        for assignment_id in cached.positions:
+            self._day_by_assignment.pop(assignment_id, None)
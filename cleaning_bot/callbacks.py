@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+
+TASK_DONE_PREFIX = "task_done:"
+# Telegram rejects callback_data longer than this many bytes.
+MAX_CALLBACK_DATA = 64
+SIGNATURE_BYTES = 8
+
+
+@dataclass(frozen=True)
+class TaskCallback:
+    assignment_id: int
+    # None for buttons sent before payloads were signed
+    user_id: Optional[int] = None
+    task_date: Optional[date] = None
+
+
+class CallbackSigner:
+    # task_done:<id>:<owner>:<date ordinal>:<hmac>. The owner and day travel
+    # with the button, so a tap from someone else or on an old message is
+    # rejected without a database round trip.
+
+    def __init__(self, secret: bytes):
+        if not secret:
+            raise ValueError("secret must not be empty")
+        self._key = hashlib.sha256(b"task_done\0" + secret).digest()
+
+    @classmethod
+    def from_token(cls, token: str) -> "CallbackSigner":
+        return cls(token.encode())
+
+    def encode(self, assignment_id: int, user_id: int, task_date: date) -> str:
+        body = f"{assignment_id}:{user_id}:{task_date.toordinal()}"
+        data = f"{TASK_DONE_PREFIX}{body}:{self._sign(body)}"
+        if len(data.encode()) > MAX_CALLBACK_DATA:  # pragma: no cover - ids fit easily
+            raise ValueError("callback data does not fit into 64 bytes")
+        return data
+
+    def decode(self, data: str) -> Optional[TaskCallback]:
+        # Returns None for anything malformed or carrying a wrong signature.
+        if not data.startswith(TASK_DONE_PREFIX):
+            return None
+        parts = data[len(TASK_DONE_PREFIX):].split(":")
+        try:
+            if len(parts) == 1:
+                return TaskCallback(int(parts[0]))
+            if len(parts) != 4:
+                return None
+            assignment_id, user_id, day, signature = parts
+            body = f"{assignment_id}:{user_id}:{day}"
+            if not hmac.compare_digest(signature, self._sign(body)):
+                return None
+            return TaskCallback(int(assignment_id), int(user_id), date.fromordinal(int(day)))
+        except ValueError:
+            return None
+
+    def _sign(self, body: str) -> str:
+        digest = hmac.new(self._key, body.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
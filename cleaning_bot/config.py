@@ -1,18 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from datetime import date, datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Tuple
 
 import os
 
+from .data_loaders import DEFAULT_HOUSEHOLD
+
 
 @dataclass(frozen=True)
 class BotConfig:
     token: str
     admin_ids: List[int]
     group_chat_id: int
+    # minimum gap between two edits of the same message
+    edit_window_ms: int = 1000
 
 
 @dataclass(frozen=True)
@@ -24,11 +28,24 @@ class SchedulerConfig:
     rotation_start: date
     extended_interval_weeks: int
     general_interval_weeks: int
+    # days after today generated ahead of time by the look-ahead job
+    pregenerate_days: int = 2
+    pregenerate_time: str = "03:00"
+    # households handled at once by one scheduled broadcast
+    broadcast_concurrency: int = 8
 
 
 @dataclass(frozen=True)
 class DatabaseConfig:
     path: Path
+    reader_pool_size: int = 4
+    statement_cache_size: int = 128
+    cache_days: int = 3
+    cache_ttl_seconds: int = 600
+    # 0 disables group commit for completion taps
+    completion_batch_ms: int = 0
+    # how many past days of sent task messages are kept for refreshing
+    task_message_days: int = 3
 
 
 @dataclass(frozen=True)
@@ -37,12 +54,59 @@ class FilesConfig:
     users: Path
 
 
+@dataclass(frozen=True)
+class WebhookConfig:
+    # disabled means long polling
+    enabled: bool = False
+    listen: str = "127.0.0.1"
+    port: int = 8080
+    path: str = "/telegram"
+    # public HTTPS address Telegram posts to; the proxy forwards it to listen:port
+    url: Optional[str] = None
+    secret_token: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class HouseholdConfig:
+    # One apartment served by the shared process: its own chat, people, tasks
+    # and rotation; the schedule falls back to the `scheduler` section.
+    id: str
+    group_chat_id: int
+    users: Path
+    tasks: Path
+    rotation_start: date
+    daily_notification_time: str
+    reminder_time: str
+    report_time: str
+
+
 @dataclass(frozen=True)
 class AppConfig:
     bot: BotConfig
     scheduler: SchedulerConfig
     database: DatabaseConfig
     files: FilesConfig
+    webhook: WebhookConfig = field(default_factory=WebhookConfig)
+    # always at least one; built from bot/files/scheduler when not configured
+    households: Tuple[HouseholdConfig, ...] = ()
+
+
+def household_config(cfg: AppConfig, household: HouseholdConfig) -> AppConfig:
+    # The household's view of the settings, so handlers keep reading
+    # `config.bot.group_chat_id` and `config.scheduler.*` unchanged.
+    return replace(
+        cfg,
+        bot=replace(cfg.bot, group_chat_id=household.group_chat_id),
+        scheduler=replace(
+            cfg.scheduler,
+            rotation_start=household.rotation_start,
+            daily_notification_time=household.daily_notification_time,
+            reminder_time=household.reminder_time,
+            report_time=household.report_time,
+        ),
+        files=FilesConfig(tasks=household.tasks, users=household.users),
+        households=(household,),
+    )
 
 
 def _parse_date(value: str) -> date:
@@ -77,7 +141,8 @@ def load_config(path: Path | str) -> AppConfig:
         )
 
     admin_ids = _ensure_int_list(bot_cfg.get("admin_ids", []))
-    group_chat_id = int(bot_cfg.get("group_chat_id"))
+    households_cfg = raw.get("households") or []
+    group_chat_id = int(bot_cfg.get("group_chat_id", 0 if households_cfg else None))
 
     scheduler_cfg = raw.get("scheduler", {})
     scheduler = SchedulerConfig(
@@ -88,6 +153,9 @@ def load_config(path: Path | str) -> AppConfig:
         rotation_start=_parse_date(scheduler_cfg.get("rotation_start", "2024-01-01")),
         extended_interval_weeks=int(scheduler_cfg.get("extended_interval_weeks", 5)),
         general_interval_weeks=int(scheduler_cfg.get("general_interval_weeks", 26)),
+        pregenerate_days=int(scheduler_cfg.get("pregenerate_days", 2)),
+        pregenerate_time=scheduler_cfg.get("pregenerate_time", "03:00"),
+        broadcast_concurrency=int(scheduler_cfg.get("broadcast_concurrency", 8)),
     )
 
     db_cfg = raw.get("database", {})
@@ -95,7 +163,30 @@ def load_config(path: Path | str) -> AppConfig:
     db_path = Path(db_path_raw).expanduser()
     if not db_path.is_absolute():
         db_path = (config_path.parent / db_path).resolve()
-    database = DatabaseConfig(path=db_path)
+    database = DatabaseConfig(
+        path=db_path,
+        reader_pool_size=int(db_cfg.get("reader_pool_size", 4)),
+        statement_cache_size=int(db_cfg.get("statement_cache_size", 128)),
+        cache_days=int(db_cfg.get("cache_days", 3)),
+        cache_ttl_seconds=int(db_cfg.get("cache_ttl_seconds", 600)),
+        completion_batch_ms=int(db_cfg.get("completion_batch_ms", 0)),
+        task_message_days=int(db_cfg.get("task_message_days", 3)),
+    )
+
+    webhook_cfg = raw.get("webhook", {})
+    webhook = WebhookConfig(
+        enabled=bool(webhook_cfg.get("enabled", False)),
+        listen=webhook_cfg.get("listen", "127.0.0.1"),
+        port=int(webhook_cfg.get("port", 8080)),
+        path=webhook_cfg.get("path", "/telegram"),
+        url=webhook_cfg.get("url"),
+        secret_token=os.environ.get(webhook_cfg.get("secret_token_env", "TELEGRAM_WEBHOOK_SECRET")),
+    )
+    if webhook.enabled and not (webhook.url and webhook.secret_token):
+        raise RuntimeError(
+            "Webhook mode needs webhook.url and a secret token in the "
+            f"{webhook_cfg.get('secret_token_env', 'TELEGRAM_WEBHOOK_SECRET')} env variable"
+        )
 
     files_cfg = raw.get("files", {})
     files = FilesConfig(
@@ -103,11 +194,52 @@ def load_config(path: Path | str) -> AppConfig:
         users=Path(files_cfg.get("users", "cleaning_bot/users.json")),
     )
 
+    households = tuple(
+        HouseholdConfig(
+            id=str(item["id"]),
+            group_chat_id=int(item["group_chat_id"]),
+            users=Path(item.get("users", files.users)),
+            tasks=Path(item.get("tasks", files.tasks)),
+            rotation_start=(
+                _parse_date(str(item["rotation_start"]))
+                if "rotation_start" in item
+                else scheduler.rotation_start
+            ),
+            daily_notification_time=item.get(
+                "daily_notification_time", scheduler.daily_notification_time
+            ),
+            reminder_time=item.get("reminder_time", scheduler.reminder_time),
+            report_time=item.get("report_time", scheduler.report_time),
+        )
+        for item in households_cfg
+    ) or (
+        HouseholdConfig(
+            id=DEFAULT_HOUSEHOLD,
+            group_chat_id=group_chat_id,
+            users=files.users,
+            tasks=files.tasks,
+            rotation_start=scheduler.rotation_start,
+            daily_notification_time=scheduler.daily_notification_time,
+            reminder_time=scheduler.reminder_time,
+            report_time=scheduler.report_time,
+        ),
+    )
+    ids = [household.id for household in households]
+    if len(set(ids)) != len(ids):
+        raise RuntimeError("Household ids in config.yaml must be unique")
+
     return AppConfig(
-        bot=BotConfig(token=token, admin_ids=admin_ids, group_chat_id=group_chat_id),
+        bot=BotConfig(
+            token=token,
+            admin_ids=admin_ids,
+            group_chat_id=group_chat_id,
+            edit_window_ms=int(bot_cfg.get("edit_window_ms", 1000)),
+        ),
         scheduler=scheduler,
         database=database,
         files=files,
+        webhook=webhook,
+        households=households,
     )
 
 
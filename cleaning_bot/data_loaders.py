@@ -6,21 +6,33 @@ from pathlib import Path
 from typing import Dict, List
 
 
+DEFAULT_HOUSEHOLD = "default"
+
+
 @dataclass(frozen=True)
 class User:
     telegram_id: int
     name: str
+    household: str = DEFAULT_HOUSEHOLD
 
 
 TaskMap = Dict[str, Dict[str, List[str]]]
 
 
-def load_users(path: Path) -> List[User]:
+def load_users(path: Path, household: str = DEFAULT_HOUSEHOLD) -> List[User]:
+    # Everyone in the file lives in `household`; the optional per-user field
+    # may only repeat it.
     with open(path, "r", encoding="utf-8") as fh:
         raw = json.load(fh)
     users: List[User] = []
     for item in raw:
-        users.append(User(telegram_id=int(item["id"]), name=item["name"]))
+        listed = str(item.get("household", household))
+        if listed != household:
+            raise ValueError(
+                f"User {item['id']} in {path} is listed for household {listed!r}, "
+                f"but the file belongs to {household!r}"
+            )
+        users.append(User(telegram_id=int(item["id"]), name=item["name"], household=household))
     if not users:
         raise ValueError("Users list cannot be empty")
     return users
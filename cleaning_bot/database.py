@@ -1,13 +1,76 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
 from contextlib import contextmanager
-from dataclasses import dataclass
-from datetime import date, datetime
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .data_loaders import User
+from .batching import CompletionBatcher, CompletionRequest
+from .cache import DayAssignmentCache
+from .data_loaders import DEFAULT_HOUSEHOLD, TaskMap, User
+from .migrations import migrate
+from .rotation import LEVEL_ORDER, LEVEL_RANK
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# (user_id, room, level, description) of an assignment that is about to be created.
+PlannedAssignment = Tuple[int, str, str, str]
+
+COMPLETION_DONE = "completed"
+COMPLETION_ALREADY_DONE = "already_completed"
+COMPLETION_NOT_FOUND = "not_found"
+COMPLETION_FORBIDDEN = "forbidden"
+
+TASK_MESSAGE_GROUP = "group"
+TASK_MESSAGE_PERSONAL = "personal"
+
+DEFAULT_READER_POOL_SIZE = 4
+DEFAULT_STATEMENT_CACHE_SIZE = 128
+
+# Applied to every connection. journal_mode is persistent in the file, the rest
+# are per-connection settings.
+CONNECTION_PRAGMAS: Tuple[Tuple[str, object], ...] = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -8000),  # negative value is KiB -> ~8 MiB page cache
+    ("mmap_size", 64 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+
+# Assignments reach their household through the user.
+_IN_HOUSEHOLD = "a.user_id IN (SELECT telegram_id FROM users WHERE household=?)"
+
+_SELECT_ASSIGNMENTS = """
+    SELECT a.id, a.task_date, a.user_id, t.room, t.level, t.description,
+           a.completed, a.completed_at
+    FROM assignments a
+    JOIN task_catalog t ON t.id = a.task_id
+"""
+
+
+def date_to_day(value: date) -> int:
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def day_to_date(value: int) -> date:
+    return date.fromordinal(value + _EPOCH_ORDINAL)
+
+
+def level_to_code(level: str) -> int:
+    try:
+        return LEVEL_RANK[level]
+    except KeyError as exc:
+        raise ValueError(f"Unknown level: {level}") from exc
+
+
+def _timestamp_to_datetime(value: int) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
 
 
 @dataclass
@@ -22,57 +85,226 @@ class Assignment:
     completed_at: Optional[datetime]
 
 
+@dataclass
+class CompletionResult:
+    status: str
+    assignment: Optional[Assignment] = None
+    # the owner's whole day after the update; empty when the tap is rejected
+    assignments: List[Assignment] = field(default_factory=list)
+
+
+@dataclass
+class TaskMessage:
+    kind: str
+    task_date: date
+    user_id: int
+    chat_id: int
+    message_id: int
+
+
+class ConnectionManager:
+    # SQLite allows a single writer at a time, so writes are serialized on one
+    # persistent connection; readers come from a pool and never block on it in WAL.
+    def __init__(
+        self,
+        path: Path,
+        *,
+        readers: int = DEFAULT_READER_POOL_SIZE,
+        statement_cache_size: int = DEFAULT_STATEMENT_CACHE_SIZE,
+        durable_writes: bool = False,
+    ):
+        if readers <= 0:
+            raise ValueError("readers must be positive")
+        self.path = path
+        self.statement_cache_size = statement_cache_size
+        # NORMAL in WAL may lose the last commits on power failure; FULL fsyncs
+        # the log on every commit.
+        self.durable_writes = durable_writes
+        self._max_readers = readers
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.RLock()
+        self._idle_readers: List[sqlite3.Connection] = []
+        self._opened_readers = 0
+        self._readers_ready = threading.Condition()
+        self._closed = False
+
+    def _open(self, *, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            conn.execute("PRAGMA query_only=1")
+        elif self.durable_writes:
+            conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self._writer_lock:
+            if self._closed:
+                raise RuntimeError("Database is closed")
+            if self._writer is None:
+                self._writer = self._open(read_only=False)
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        with self._readers_ready:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Database is closed")
+                if self._idle_readers:
+                    return self._idle_readers.pop()
+                if self._opened_readers < self._max_readers:
+                    self._opened_readers += 1
+                    break
+                self._readers_ready.wait()
+        try:
+            return self._open(read_only=True)
+        except BaseException:
+            with self._readers_ready:
+                self._opened_readers -= 1
+                self._readers_ready.notify()
+            raise
+
+    def _release_reader(self, conn: sqlite3.Connection) -> None:
+        with self._readers_ready:
+            if self._closed:
+                conn.close()
+                self._opened_readers -= 1
+            else:
+                self._idle_readers.append(conn)
+            self._readers_ready.notify()
+
+    def close(self) -> None:
+        with self._writer_lock, self._readers_ready:
+            self._closed = True
+            if self._writer is not None:
+                self._writer.execute("PRAGMA optimize")
+                self._writer.close()
+                self._writer = None
+            for conn in self._idle_readers:
+                conn.close()
+            self._opened_readers -= len(self._idle_readers)
+            self._idle_readers.clear()
+            self._readers_ready.notify_all()
+
+
 class Database:
-    def __init__(self, path: Path):
+    def __init__(
+        self,
+        path: Path,
+        *,
+        readers: int = DEFAULT_READER_POOL_SIZE,
+        statement_cache_size: int = DEFAULT_STATEMENT_CACHE_SIZE,
+        cache: DayAssignmentCache | None = None,
+        completion_batch_window: float | None = None,
+    ):
         self.path = path
+        self.cache = cache if cache is not None else DayAssignmentCache()
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._task_ids: Dict[Tuple[str, int, str], int] = {}
+        # household of every synced user, which picks their cached day
+        self._households: Dict[int, str] = {}
+        # Group commit acknowledges taps after their commit, which is only
+        # durable with FULL; one fsync then covers the whole batch.
+        self._connections = ConnectionManager(
+            path,
+            readers=readers,
+            statement_cache_size=statement_cache_size,
+            durable_writes=completion_batch_window is not None,
+        )
         self._ensure_schema()
+        self.batcher: CompletionBatcher | None = None
+        if completion_batch_window is not None:
+            self.batcher = CompletionBatcher(
+                self.complete_assignments, window=completion_batch_window
+            )
 
     @contextmanager
-    def connect(self):
-        conn = sqlite3.connect(self.path)
+    def connect(self) -> Iterator[sqlite3.Connection]:
         try:
-            conn.row_factory = sqlite3.Row
+            with self._connections.writer() as conn:
+                yield conn
+        except BaseException:
+            # catalog ids resolved inside the rolled back transaction are gone
+            self._task_ids.clear()
+            raise
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        with self._connections.reader() as conn:
             yield conn
-            conn.commit()
-        finally:
-            conn.close()
+
+    def close(self) -> None:
+        if self.batcher is not None:
+            self.batcher.close()
+        self._connections.close()
 
     def _ensure_schema(self) -> None:
         with self.connect() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    telegram_id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS assignments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task_date TEXT NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    room TEXT NOT NULL,
-                    level TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    completed INTEGER NOT NULL DEFAULT 0,
-                    completed_at TEXT,
-                    UNIQUE(task_date, user_id, room, level, description),
-                    FOREIGN KEY(user_id) REFERENCES users(telegram_id)
-                )
-                """
-            )
+            migrate(conn)
 
     def sync_users(self, users: Iterable[User]) -> None:
         with self.connect() as conn:
             for user in users:
                 conn.execute(
-                    "INSERT INTO users(telegram_id, name) VALUES(?, ?)"
-                    " ON CONFLICT(telegram_id) DO UPDATE SET name=excluded.name",
-                    (user.telegram_id, user.name),
+                    "INSERT INTO users(telegram_id, name, household) VALUES(?, ?, ?)"
+                    " ON CONFLICT(telegram_id) DO UPDATE SET"
+                    " name=excluded.name, household=excluded.household",
+                    (user.telegram_id, user.name, user.household),
                 )
+                self._households[user.telegram_id] = user.household
+
+    def sync_task_catalog(self, tasks: TaskMap) -> None:
+        with self.connect() as conn:
+            self._resolve_task_ids(
+                conn,
+                (
+                    (room, level, description)
+                    for room, levels in tasks.items()
+                    for level, descriptions in levels.items()
+                    for description in descriptions
+                ),
+            )
+
+    def _resolve_task_ids(
+        self, conn: sqlite3.Connection, tasks: Iterable[Tuple[str, str, str]]
+    ) -> List[int]:
+        # Catalog rows are never removed, so ids can be cached for the lifetime
+        # of the process. Only the writer connection calls this.
+        keys = [(room, level_to_code(level), description) for room, level, description in tasks]
+        missing = [key for key in dict.fromkeys(keys) if key not in self._task_ids]
+        if missing:
+            conn.executemany(
+                "INSERT OR IGNORE INTO task_catalog(room, level, description) VALUES(?, ?, ?)",
+                missing,
+            )
+            for key in missing:
+                row = conn.execute(
+                    "SELECT id FROM task_catalog WHERE room=? AND level=? AND description=?",
+                    key,
+                ).fetchone()
+                self._task_ids[key] = int(row[0])
+        return [self._task_ids[key] for key in keys]
 
     def add_assignment(
         self,
@@ -81,60 +313,108 @@ class Database:
         room: str,
         level: str,
         description: str,
+        household: str = DEFAULT_HOUSEHOLD,
     ) -> int:
+        day = date_to_day(task_date)
         with self.connect() as conn:
+            (task_id,) = self._resolve_task_ids(conn, [(room, level, description)])
             cursor = conn.execute(
-                """
-                INSERT OR IGNORE INTO assignments(task_date, user_id, room, level, description)
-                VALUES(?, ?, ?, ?, ?)
-                """,
-                (task_date.isoformat(), user_id, room, level, description),
+                "INSERT OR IGNORE INTO assignments(task_date, user_id, task_id) VALUES(?, ?, ?)",
+                (day, user_id, task_id),
             )
-            if cursor.lastrowid:
-                return cursor.lastrowid
+            if cursor.rowcount:
+                self.cache.invalidate((household, task_date))
+                return int(cursor.lastrowid)
             # fetch id for existing row
             existing = conn.execute(
-                """
-                SELECT id FROM assignments WHERE task_date=? AND user_id=? AND room=? AND level=? AND description=?
-                """,
-                (task_date.isoformat(), user_id, room, level, description),
+                "SELECT id FROM assignments WHERE task_date=? AND user_id=? AND task_id=?",
+                (day, user_id, task_id),
             ).fetchone()
             return int(existing[0])
 
-    def list_assignments_for_user(self, task_date: date, user_id: int) -> List[Assignment]:
+    def add_assignments_bulk(
+        self,
+        task_date: date,
+        planned: Iterable[PlannedAssignment],
+        household: str = DEFAULT_HOUSEHOLD,
+    ) -> List[Assignment]:
+        planned = list(planned)
+        day = date_to_day(task_date)
         with self.connect() as conn:
+            generation = self.cache.generation()
+            task_ids = self._resolve_task_ids(
+                conn, ((room, level, description) for _, room, level, description in planned)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO assignments(task_date, user_id, task_id) VALUES(?, ?, ?)",
+                (
+                    (day, user_id, task_id)
+                    for (user_id, _, _, _), task_id in zip(planned, task_ids)
+                ),
+            )
             rows = conn.execute(
-                """
-                SELECT id, task_date, user_id, room, level, description, completed, completed_at
-                FROM assignments
-                WHERE task_date=? AND user_id=?
-                ORDER BY room, level, id
+                _SELECT_ASSIGNMENTS
+                + f"""
+                WHERE a.task_date=? AND {_IN_HOUSEHOLD}
+                ORDER BY a.user_id, t.room, t.level, a.id
                 """,
-                (task_date.isoformat(), user_id),
+                (day, household),
             ).fetchall()
-        return [self._row_to_assignment(row) for row in rows]
+        assignments = [self._row_to_assignment(row) for row in rows]
+        self.cache.put((household, task_date), assignments, generation)
+        return assignments
 
-    def list_assignments(self, task_date: date) -> List[Assignment]:
-        with self.connect() as conn:
+    def list_assignments_for_user(self, task_date: date, user_id: int) -> List[Assignment]:
+        cached = self._cached_user_day(task_date, user_id)
+        if cached is not None:
+            return cached
+        with self.read() as conn:
             rows = conn.execute(
-                """
-                SELECT id, task_date, user_id, room, level, description, completed, completed_at
-                FROM assignments
-                WHERE task_date=?
-                ORDER BY user_id, room, level
+                _SELECT_ASSIGNMENTS
+                + """
+                WHERE a.task_date=? AND a.user_id=?
+                ORDER BY t.room, t.level, a.id
                 """,
-                (task_date.isoformat(),),
+                (date_to_day(task_date), user_id),
             ).fetchall()
         return [self._row_to_assignment(row) for row in rows]
 
+    def _cached_user_day(self, task_date: date, user_id: int) -> Optional[List[Assignment]]:
+        # Only the user's own household's day says they have no tasks; users
+        # not synced in this process always go to SQLite.
+        household = self._households.get(user_id)
+        if household is None:
+            return None
+        return self.cache.get_user((household, task_date), user_id)
+
+    def list_assignments(
+        self, task_date: date, household: str = DEFAULT_HOUSEHOLD
+    ) -> List[Assignment]:
+        cached = self.cache.get_day((household, task_date))
+        if cached is not None:
+            return cached
+        generation = self.cache.generation()
+        with self.read() as conn:
+            rows = conn.execute(
+                _SELECT_ASSIGNMENTS
+                + f"""
+                WHERE a.task_date=? AND {_IN_HOUSEHOLD}
+                ORDER BY a.user_id, t.room, t.level, a.id
+                """,
+                (date_to_day(task_date), household),
+            ).fetchall()
+        assignments = [self._row_to_assignment(row) for row in rows]
+        if assignments:
+            self.cache.put((household, task_date), assignments, generation)
+        return assignments
+
     def get_assignment(self, assignment_id: int) -> Optional[Assignment]:
-        with self.connect() as conn:
+        cached = self.cache.get_assignment(assignment_id)
+        if cached is not None:
+            return cached
+        with self.read() as conn:
             row = conn.execute(
-                """
-                SELECT id, task_date, user_id, room, level, description, completed, completed_at
-                FROM assignments
-                WHERE id=?
-                """,
+                _SELECT_ASSIGNMENTS + " WHERE a.id=?",
                 (assignment_id,),
             ).fetchone()
 
@@ -143,44 +423,121 @@ class Database:
         return self._row_to_assignment(row)
 
     def mark_completed(self, assignment_id: int) -> None:
+        completed_at = int(datetime.now(timezone.utc).timestamp())
         with self.connect() as conn:
             conn.execute(
                 "UPDATE assignments SET completed=1, completed_at=? WHERE id=?",
-                (datetime.utcnow().isoformat(), assignment_id),
+                (completed_at, assignment_id),
             )
+        self.cache.mark_completed(assignment_id, _timestamp_to_datetime(completed_at))
 
-    def list_incomplete_for_user(self, task_date: date, user_id: int) -> List[Assignment]:
+    def complete_assignment(self, assignment_id: int, user_id: int) -> CompletionResult:
+        if self.batcher is not None:
+            return self.batcher.submit(assignment_id, user_id).result()
+        return self.complete_assignments([(assignment_id, user_id)])[0]
+
+    def complete_assignments(
+        self, requests: Sequence[CompletionRequest]
+    ) -> List[CompletionResult]:
+        completed_at = int(datetime.now(timezone.utc).timestamp())
         with self.connect() as conn:
+            results = [
+                self._complete_in(conn, assignment_id, user_id, completed_at)
+                for assignment_id, user_id in requests
+            ]
+        for result in results:
+            if result.status == COMPLETION_DONE:
+                self.cache.mark_completed(result.assignment.id, result.assignment.completed_at)
+        return results
+
+    def _complete_in(
+        self, conn: sqlite3.Connection, assignment_id: int, user_id: int, completed_at: int
+    ) -> CompletionResult:
+        updated = conn.execute(
+            """
+            UPDATE assignments SET completed=1, completed_at=?
+            WHERE id=? AND user_id=? AND completed=0
+            RETURNING task_date
+            """,
+            (completed_at, assignment_id, user_id),
+        ).fetchone()
+        if updated:
+            status = COMPLETION_DONE
+            day = updated[0]
+        else:
+            existing = conn.execute(
+                "SELECT task_date, user_id FROM assignments WHERE id=?",
+                (assignment_id,),
+            ).fetchone()
+            if not existing:
+                return CompletionResult(status=COMPLETION_NOT_FOUND)
+            if existing[1] != user_id:
+                return CompletionResult(status=COMPLETION_FORBIDDEN)
+            status = COMPLETION_ALREADY_DONE
+            day = existing[0]
+        rows = conn.execute(
+            _SELECT_ASSIGNMENTS
+            + """
+            WHERE a.task_date=? AND a.user_id=?
+            ORDER BY t.room, t.level, a.id
+            """,
+            (day, user_id),
+        ).fetchall()
+        assignments = [self._row_to_assignment(row) for row in rows]
+        assignment = next(a for a in assignments if a.id == assignment_id)
+        return CompletionResult(status=status, assignment=assignment, assignments=assignments)
+
+    def list_incomplete_for_user(self, task_date: date, user_id: int) -> List[Assignment]:
+        cached = self._cached_user_day(task_date, user_id)
+        if cached is not None:
+            return [assignment for assignment in cached if not assignment.completed]
+        with self.read() as conn:
             rows = conn.execute(
-                """
-                SELECT id, task_date, user_id, room, level, description, completed, completed_at
-                FROM assignments
-                WHERE task_date=? AND user_id=? AND completed=0
-                ORDER BY room, level, id
+                _SELECT_ASSIGNMENTS
+                + """
+                WHERE a.task_date=? AND a.user_id=? AND a.completed=0
+                ORDER BY t.room, t.level, a.id
                 """,
-                (task_date.isoformat(), user_id),
+                (date_to_day(task_date), user_id),
             ).fetchall()
         return [self._row_to_assignment(row) for row in rows]
 
-    def daily_stats(self, start: date, end: date) -> List[Tuple[int, str, date, int, int]]:
-        with self.connect() as conn:
+    def list_incomplete(
+        self, task_date: date, household: str = DEFAULT_HOUSEHOLD
+    ) -> List[Assignment]:
+        # Everyone's open tasks for the day in one query, ordered by user.
+        cached = self.cache.get_day((household, task_date))
+        if cached is not None:
+            return [assignment for assignment in cached if not assignment.completed]
+        with self.read() as conn:
+            rows = conn.execute(
+                _SELECT_ASSIGNMENTS
+                + f"""
+                WHERE a.task_date=? AND {_IN_HOUSEHOLD} AND a.completed=0
+                ORDER BY a.user_id, t.room, t.level, a.id
+                """,
+                (date_to_day(task_date), household),
+            ).fetchall()
+        return [self._row_to_assignment(row) for row in rows]
+
+    def daily_stats(
+        self, start: date, end: date, household: str = DEFAULT_HOUSEHOLD
+    ) -> List[Tuple[int, str, date, int, int]]:
+        with self.read() as conn:
             rows = conn.execute(
                 """
-                SELECT a.user_id, u.name, a.task_date,
-                       SUM(CASE WHEN a.completed=1 THEN 1 ELSE 0 END) AS completed_count,
-                       COUNT(*) AS total
-                FROM assignments a
-                JOIN users u ON u.telegram_id = a.user_id
-                WHERE a.task_date BETWEEN ? AND ?
-                GROUP BY a.user_id, u.name, a.task_date
-                ORDER BY u.name, a.task_date
+                SELECT s.user_id, u.name, s.task_date, s.completed, s.total
+                FROM daily_user_stats s
+                JOIN users u ON u.telegram_id = s.user_id
+                WHERE s.task_date BETWEEN ? AND ? AND u.household=?
+                ORDER BY u.name, s.task_date
                 """,
-                (start.isoformat(), end.isoformat()),
+                (date_to_day(start), date_to_day(end), household),
             ).fetchall()
 
         results: List[Tuple[int, str, date, int, int]] = []
         for row in rows:
-            task_date = date.fromisoformat(str(row[2]))
+            task_date = day_to_date(row[2])
             results.append(
                 (
                     int(row[0]),
@@ -192,16 +549,71 @@ class Database:
             )
         return results
 
+    def save_task_message(self, message: TaskMessage) -> None:
+        with self.connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO task_messages(task_date, user_id, kind, chat_id, message_id)
+                VALUES(?, ?, ?, ?, ?)
+                ON CONFLICT(task_date, user_id, kind) DO UPDATE SET
+                    chat_id = excluded.chat_id,
+                    message_id = excluded.message_id
+                """,
+                (
+                    date_to_day(message.task_date),
+                    message.user_id,
+                    message.kind,
+                    message.chat_id,
+                    message.message_id,
+                ),
+            )
+
+    def delete_task_message(self, kind: str, task_date: date, user_id: int) -> None:
+        with self.connect() as conn:
+            conn.execute(
+                "DELETE FROM task_messages WHERE task_date=? AND user_id=? AND kind=?",
+                (date_to_day(task_date), user_id, kind),
+            )
+
+    def list_task_messages(self, since: date) -> List[TaskMessage]:
+        with self.read() as conn:
+            rows = conn.execute(
+                """
+                SELECT kind, task_date, user_id, chat_id, message_id
+                FROM task_messages
+                WHERE task_date >= ?
+                ORDER BY task_date, user_id, kind
+                """,
+                (date_to_day(since),),
+            ).fetchall()
+        return [
+            TaskMessage(
+                kind=str(row[0]),
+                task_date=day_to_date(row[1]),
+                user_id=int(row[2]),
+                chat_id=int(row[3]),
+                message_id=int(row[4]),
+            )
+            for row in rows
+        ]
+
+    def prune_task_messages(self, before: date) -> int:
+        with self.connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM task_messages WHERE task_date < ?", (date_to_day(before),)
+            )
+        return cursor.rowcount
+
     @staticmethod
     def _row_to_assignment(row: sqlite3.Row) -> Assignment:
         completed_at = row[7]
         return Assignment(
             id=int(row[0]),
-            task_date=datetime.fromisoformat(row[1]).date(),
+            task_date=day_to_date(row[1]),
             user_id=int(row[2]),
             room=str(row[3]),
-            level=str(row[4]),
+            level=LEVEL_ORDER[row[4]],
             description=str(row[5]),
             completed=bool(row[6]),
-            completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
+            completed_at=_timestamp_to_datetime(completed_at) if completed_at else None,
         )
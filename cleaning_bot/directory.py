@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping, Tuple
+
+from .data_loaders import User
+
+
+@dataclass(frozen=True)
+class UserDirectory:
+    # Lookup tables over the configured users. Built once and never mutated: a
+    # reload builds a new directory and swaps the reference, so handlers always
+    # see one consistent snapshot.
+    users: Tuple[User, ...]
+    by_id: Mapping[int, User]
+    admin_ids: FrozenSet[int]
+
+    @classmethod
+    def build(cls, users: Iterable[User], admin_ids: Iterable[int] = ()) -> "UserDirectory":
+        ordered = tuple(users)
+        return cls(
+            users=ordered,
+            by_id=MappingProxyType({user.telegram_id: user for user in ordered}),
+            admin_ids=frozenset(admin_ids),
+        )
+
+    def name_of(self, user_id: int) -> str:
+        user = self.by_id.get(user_id)
+        return user.name if user else ""
+
+    def is_admin(self, user_id: int | None) -> bool:
+        return user_id in self.admin_ids
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import logging
+from dataclasses import dataclass, field, replace
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Tuple, TYPE_CHECKING
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple, TYPE_CHECKING
 
 from telegram import (
     BotCommand,
@@ -10,10 +12,29 @@ from telegram import (
     BotCommandScopeAllPrivateChats,
 )
 
+from .broadcast import BroadcastEngine, BroadcastSummary
+from .callbacks import TASK_DONE_PREFIX, CallbackSigner
 from .config import AppConfig
-from .data_loaders import TaskMap, User
-from .database import Assignment, Database
+from .data_loaders import DEFAULT_HOUSEHOLD, TaskMap, User
+from .database import (
+    COMPLETION_ALREADY_DONE,
+    COMPLETION_FORBIDDEN,
+    COMPLETION_NOT_FOUND,
+    TASK_MESSAGE_GROUP,
+    TASK_MESSAGE_PERSONAL,
+    Assignment,
+    Database,
+    PlannedAssignment,
+    TaskMessage,
+)
+from .directory import UserDirectory
+from .edits import DEFAULT_EDIT_WINDOW, UNCHANGED, EditScheduler
+from .outbound import PRIORITY_BROADCAST, OutboundQueue
+from .render import RenderCache, content_fingerprint, view_key
 from .rotation import expand_levels, get_day_levels, rotate_rooms, weeks_between
+from .singleflight import SingleFlight
+from .storage import AsyncDatabase
+from .tenancy import Tenants
 from .utils import (
     format_assignments,
     format_daily_report,
@@ -27,24 +48,71 @@ if TYPE_CHECKING:  # pragma: no cover - typing helper
     from telegram.ext import Application, ContextTypes
 
 
+logger = logging.getLogger(__name__)
+
+# reminder DMs in flight at once; the outbound queue still enforces rate limits
+REMINDER_CONCURRENCY = 8
+# BadRequest texts saying a message can never be edited again
+GONE_MESSAGE_ERRORS = (
+    "message to edit not found",
+    "message can't be edited",
+    "message_id_invalid",
+)
+
+
 @dataclass
 class AppContext:
     config: AppConfig
     db: Database
     users: List[User]
     tasks: TaskMap
+    storage: AsyncDatabase | None = None
+    directory: UserDirectory | None = None
+    # in-flight generation of a day's assignments, keyed by date
+    generations: SingleFlight = field(default_factory=SingleFlight)
+    views: RenderCache["TaskView"] = field(default_factory=RenderCache)
+    callbacks: CallbackSigner | None = None
+    household: str = DEFAULT_HOUSEHOLD
+    # set by Tenants.build; routes chats and people to their household
+    tenants: Tenants | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.storage is None:
+            self.storage = AsyncDatabase(self.db)
+        if self.callbacks is None:
+            self.callbacks = CallbackSigner.from_token(self.config.bot.token)
+        if self.directory is None:
+            self.directory = UserDirectory.build(self.users, self.config.bot.admin_ids)
+
+    def reload_users(self, users: List[User]) -> None:
+        # One reference swap, so concurrent handlers never see a half-built index
+        # or a tenant route pointing at the old members.
+        users = [replace(user, household=self.household) for user in users]
+        directory = UserDirectory.build(users, self.config.bot.admin_ids)
+        routes = self.tenants.routes_with(self, directory) if self.tenants else None
+        # Day-wide reads find a household's rows through users.household, so
+        # the database learns about new members before anyone can be assigned.
+        self.db.sync_users(users)
+        self.directory = directory
+        self.users = list(directory.users)
+        if routes is not None:
+            self.tenants.routes = routes
+        self.views.clear()  # group texts carry the owner's name
 
 
 @dataclass
 class GroupTaskMessage:
     chat_id: int
     message_id: int
+    # content_fingerprint of what the message shows, None if not known
+    fingerprint: str | None = field(default=None, compare=False)
 
 
 @dataclass
 class PersonalTaskMessage:
     chat_id: int
     message_id: int
+    fingerprint: str | None = field(default=None, compare=False)
 
 
 @dataclass
@@ -52,13 +120,23 @@ class TaskView:
     assignments: List[Assignment]
     personal_text: str
     group_text: str
+    reminder_text: str
     keyboard: "InlineKeyboardMarkup | None"
 
 
-def register_handlers(app: "Application", ctx: AppContext) -> None:
+def register_handlers(
+    app: "Application", ctx: AppContext, *, tenants: Tenants | None = None
+) -> None:
     from telegram.ext import CallbackQueryHandler, CommandHandler, MessageHandler, filters
 
+    # `ctx` is the default household; `tenants` routes chats and people of the
+    # others to their own context.
     app.bot_data["app_context"] = ctx
+    app.bot_data["tenants"] = tenants or Tenants.build([ctx])
+    app.bot_data["edit_scheduler"] = EditScheduler(window=ctx.config.bot.edit_window_ms / 1000)
+    app.bot_data["broadcasts"] = BroadcastEngine(
+        concurrency=ctx.config.scheduler.broadcast_concurrency
+    )
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("chatid", chat_id))
     app.add_handler(CommandHandler("tasks", tasks_command))
@@ -76,7 +154,7 @@ def register_handlers(app: "Application", ctx: AppContext) -> None:
         )
     )
     app.add_handler(CallbackQueryHandler(handle_quick_action, pattern=r"^quick_action:"))
-    app.add_handler(CallbackQueryHandler(on_task_completed, pattern=r"^task_done:"))
+    app.add_handler(CallbackQueryHandler(on_task_completed, pattern=f"^{TASK_DONE_PREFIX}"))
 
 
 async def start(update, context) -> None:
@@ -143,12 +221,15 @@ async def welcome(update, context) -> None:
     hints = [
         "• Быстрые команды доступны на кнопках ниже.",
         "• Используй кнопку ✅ в сообщениях, чтобы отмечать завершённые задания.",
-        "• Команда /tasks вернёт актуальный список дел в любой момент.",
+        "• Команда /tasks вернёт актуальный список дел в любой момент, /tasks завтра — план на завтра.",
         "• Команда /stats покажет прогресс за неделю и месяц.",
     ]
     text = intro + "\n" + "\n".join(hints)
     keyboard = build_command_hint_keyboard()
-    await update.effective_message.reply_text(text, reply_markup=keyboard)
+    message = update.effective_message
+    await _outbound(context.application).send(
+        _message_chat_id(message), lambda: message.reply_text(text, reply_markup=keyboard)
+    )
 
 
 async def chat_id(update, context) -> None:
@@ -156,8 +237,13 @@ async def chat_id(update, context) -> None:
 
     app_ctx = context.application.bot_data["app_context"]
     user_id = update.effective_user.id if update.effective_user else None
-    if user_id not in app_ctx.config.bot.admin_ids:
-        await update.message.reply_text("Команда доступна только администраторам бота.")
+    message = update.message
+    outbound = _outbound(context.application)
+    if not app_ctx.directory.is_admin(user_id):
+        await outbound.send(
+            _message_chat_id(message),
+            lambda: message.reply_text("Команда доступна только администраторам бота."),
+        )
         return
 
     chat = update.effective_chat
@@ -169,18 +255,31 @@ async def chat_id(update, context) -> None:
             "Добавьте это значение в `bot.group_chat_id` внутри `cleaning_bot/config.yaml`,"
         )
 
-    await update.message.reply_text(
-        "\n".join(lines),
-        parse_mode=ParseMode.MARKDOWN,
+    await outbound.send(
+        _message_chat_id(message),
+        lambda: message.reply_text("\n".join(lines), parse_mode=ParseMode.MARKDOWN),
     )
 
 
+TOMORROW_ARGS = {"завтра", "tomorrow"}
+
+
 async def tasks_command(update, context) -> None:
-    await _send_tasks(context, update.effective_chat, update.effective_user, update.effective_message)
+    today = datetime.now().date()
+    args = [arg.lower() for arg in context.args or []]
+    # tomorrow is pre-generated by the look-ahead job, so this is only a read
+    task_date = today + timedelta(days=1) if args and args[0] in TOMORROW_ARGS else today
+    await _send_tasks(
+        context,
+        update.effective_chat,
+        update.effective_user,
+        update.effective_message,
+        task_date=task_date,
+    )
 
 
 async def stats_command(update, context) -> None:
-    await _send_stats(context, update.effective_message)
+    await _send_stats(context, update.effective_message, user=update.effective_user)
 
 
 async def handle_quick_action(update, context) -> None:
@@ -200,23 +299,31 @@ async def handle_quick_action(update, context) -> None:
         await _send_tasks(context, chat, query.from_user, message)
     elif action == "stats":
         await query.answer()
-        await _send_stats(context, message)
+        await _send_stats(context, message, user=query.from_user)
     else:
         await query.answer()
 
 
-async def _send_tasks(context, chat, user, message):
+async def _send_tasks(context, chat, user, message, *, task_date: date | None = None):
     from telegram.constants import ParseMode
 
-    app_ctx = context.application.bot_data["app_context"]
+    app_ctx = _context_for(context.application, getattr(chat, "id", None), getattr(user, "id", None))
     today = datetime.now().date()
-    assignments_by_user = ensure_assignments_for_date(app_ctx, today)
+    task_date = task_date or today
+    is_today = task_date == today
+    assignments_by_user = await ensure_assignments(app_ctx, task_date)
+
+    outbound = _outbound(context.application)
 
     async def respond(text, **kwargs):
         if message:
-            return await message.reply_text(text, **kwargs)
+            return await outbound.send(
+                _message_chat_id(message), lambda: message.reply_text(text, **kwargs)
+            )
         if chat:
-            return await context.bot.send_message(chat_id=chat.id, text=text, **kwargs)
+            return await outbound.send(
+                chat.id, lambda: context.bot.send_message(chat_id=chat.id, text=text, **kwargs)
+            )
         return None
 
     if chat and chat.type == "private":
@@ -226,60 +333,67 @@ async def _send_tasks(context, chat, user, message):
         )
 
         if not assignments:
-            await respond("На сегодня для тебя нет назначенных задач.")
+            day = "сегодня" if is_today else "завтра"
+            await respond(f"На {day} для тебя нет назначенных задач.")
             return
 
-        text = build_personal_message(assignments, today)
-        keyboard = build_keyboard(assignments)
+        view = _render_task_view(app_ctx, task_date, user_id, assignments)
         sent_message = await respond(
-            text,
+            view.personal_text,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard,
+            reply_markup=view.keyboard,
         )
         if sent_message:
-            _store_personal_task_message(
+            await _store_personal_task_message(
                 context.application,
-                today,
+                task_date,
                 user_id,
                 sent_message,
+                fingerprint=content_fingerprint(view.personal_text, view.keyboard),
             )
         return
 
     sent_any = False
-    for block in build_group_blocks(app_ctx, assignments_by_user, today):
+    for block in build_group_blocks(app_ctx, assignments_by_user, task_date):
         sent_message = await respond(
             block.text,
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=block.keyboard,
         )
         if sent_message:
-            _store_group_task_message(
+            await _store_group_task_message(
                 context.application,
-                today,
+                task_date,
                 block.user_id,
                 sent_message,
+                fingerprint=content_fingerprint(block.text, block.keyboard),
             )
         sent_any = True
 
     if not sent_any:
         await respond(
-            "Сегодня задач нет.",
+            "Сегодня задач нет." if is_today else "Завтра задач нет.",
             parse_mode=ParseMode.MARKDOWN,
         )
 
 
-async def _send_stats(context, message, chat=None):
+async def _send_stats(context, message, chat=None, *, user=None):
     from telegram.constants import ParseMode
 
-    app_ctx = context.application.bot_data["app_context"]
+    target_chat = chat or (getattr(message, "chat", None) if message else None)
+    app_ctx = _context_for(
+        context.application, getattr(target_chat, "id", None), getattr(user, "id", None)
+    )
     today = datetime.now().date()
 
     week_start = today - timedelta(days=today.weekday())
     week_end = week_start + timedelta(days=6)
     month_start = today.replace(day=1)
 
-    week_rows = app_ctx.db.daily_stats(week_start, week_end)
-    month_rows = app_ctx.db.daily_stats(month_start, today)
+    week_rows, month_rows = await asyncio.gather(
+        app_ctx.storage.daily_stats(week_start, week_end, household=app_ctx.household),
+        app_ctx.storage.daily_stats(month_start, today, household=app_ctx.household),
+    )
 
     parts = [
         format_stats("неделю", week_rows, mode="week"),
@@ -289,190 +403,367 @@ async def _send_stats(context, message, chat=None):
     if not text:
         text = "Пока нет данных для отображения статистики."
 
-    target_chat = chat or (getattr(message, "chat", None) if message else None)
-
+    outbound = _outbound(context.application)
     if message:
-        await message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
+        await outbound.send(
+            _message_chat_id(message),
+            lambda: message.reply_text(text, parse_mode=ParseMode.MARKDOWN),
+        )
     elif target_chat:
-        await context.bot.send_message(
-            chat_id=target_chat.id,
-            text=text,
-            parse_mode=ParseMode.MARKDOWN,
+        await outbound.send(
+            target_chat.id,
+            lambda: context.bot.send_message(
+                chat_id=target_chat.id,
+                text=text,
+                parse_mode=ParseMode.MARKDOWN,
+            ),
         )
 
 
 async def on_task_completed(update, context) -> None:
     query = update.callback_query
-    app_ctx = context.application.bot_data["app_context"]
+    app_ctx = _context_for(
+        context.application,
+        getattr(getattr(query.message, "chat", None), "id", None),
+        getattr(query.from_user, "id", None),
+    )
+
+    payload = app_ctx.callbacks.decode(query.data)
+    if payload is None:
+        await query.answer("Кнопка устарела. Запроси задачи заново командой /tasks.", show_alert=True)
+        return
+
+    user = query.from_user
+    # Signed buttons name their owner and day, so these taps never reach the database.
+    if not user or (payload.user_id is not None and payload.user_id != user.id):
+        await query.answer("Эта задача закреплена за другим участником.", show_alert=True)
+        return
+    if payload.task_date is not None and payload.task_date < _task_message_cutoff(app_ctx):
+        await query.answer("Кнопка устарела. Запроси задачи заново командой /tasks.", show_alert=True)
+        return
 
-    assignment_id = int(query.data.split(":", 1)[1])
-    assignment = app_ctx.db.get_assignment(assignment_id)
+    result = await app_ctx.storage.complete_assignment(payload.assignment_id, user.id)
 
-    if not assignment:
+    if result.status == COMPLETION_NOT_FOUND:
         await query.answer("Не удалось найти задачу. Попробуй ещё раз позже.", show_alert=True)
         return
 
-    user = query.from_user
-    if not user or user.id != assignment.user_id:
+    if result.status == COMPLETION_FORBIDDEN:
         await query.answer("Эта задача закреплена за другим участником.", show_alert=True)
         return
 
+    if result.status == COMPLETION_ALREADY_DONE:
+        await query.answer("Задача уже отмечена как выполненная.")
+        return
+
     await query.answer()
-    app_ctx.db.mark_completed(assignment_id)
+    assignment = result.assignment
 
     from telegram.constants import ParseMode
 
-    view = _build_task_view(app_ctx, assignment.task_date, assignment.user_id)
+    view = _render_task_view(app_ctx, assignment.task_date, assignment.user_id, result.assignments)
 
     message = query.message
     if not message:
-        await _refresh_group_task_message(context, assignment, view=view)
-        await _refresh_personal_task_message(context, assignment, view=view)
+        await _run_isolated(
+            _refresh_group_task_message(context, assignment, view=view),
+            _refresh_personal_task_message(context, assignment, view=view),
+        )
         return
 
     task_date = assignment.task_date
     is_reminder = bool(message.text and message.text.startswith("Напоминаю"))
 
     if is_reminder:
-        remaining = [a for a in view.assignments if not a.completed]
-        if remaining:
-            levels_line = format_levels_line(remaining)
-            parts = ["Напоминаю, что сегодня ещё есть невыполненные задачи:"]
-            if levels_line:
-                parts.append(levels_line)
-            parts.append(format_assignments(remaining))
-            new_text = "\n".join(parts)
-        else:
-            new_text = "Все задачи на сегодня выполнены! 🎉"
-        keyboard = view.keyboard
+        new_text = view.reminder_text
+    elif message.chat and message.chat.type in {"group", "supergroup"}:
+        new_text = view.group_text
     else:
-        if message.chat and message.chat.type in {"group", "supergroup"}:
-            new_text = view.group_text
-        else:
-            new_text = view.personal_text
-        keyboard = view.keyboard
-
-    await query.edit_message_text(
-        text=new_text,
-        parse_mode=ParseMode.MARKDOWN,
-        reply_markup=keyboard,
-    )
+        new_text = view.personal_text
+    keyboard = view.keyboard
 
     chat = message.chat
     chat_id = getattr(chat, "id", None) if chat else None
     message_id = getattr(message, "message_id", None)
+    skip = {"skip_chat_id": chat_id, "skip_message_id": message_id}
     if chat and chat.type in {"group", "supergroup"}:
-        await _refresh_group_task_message(
-            context,
-            assignment,
-            view=view,
-            skip_chat_id=chat_id,
-            skip_message_id=message_id,
-        )
-        await _refresh_personal_task_message(context, assignment, view=view)
+        group_skip, personal_skip = skip, {}
+        tracked_store = context.application.bot_data.get("group_task_messages", {})
     else:
-        await _refresh_group_task_message(context, assignment, view=view)
-        await _refresh_personal_task_message(
-            context,
-            assignment,
-            view=view,
-            skip_chat_id=chat_id,
-            skip_message_id=message_id,
+        group_skip, personal_skip = {}, skip
+        tracked_store = context.application.bot_data.get("personal_task_messages", {})
+    # the tapped message is usually a tracked one; keep its fingerprint current
+    tapped_ref = tracked_store.get((task_date.isoformat(), assignment.user_id))
+    if tapped_ref is None or (tapped_ref.chat_id, tapped_ref.message_id) != (chat_id, message_id):
+        tapped_ref = PersonalTaskMessage(chat_id, message_id)
+
+    async def edit_tapped():
+        return await _edit_if_changed(
+            context.application,
+            tapped_ref,
+            new_text,
+            keyboard,
+            lambda: query.edit_message_text(
+                text=new_text,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=keyboard,
+            ),
         )
 
+    # Edits go through the scheduler, so a burst of taps on the same message
+    # collapses into one edit with the final state instead of queueing up.
+    edits = [
+        _refresh_group_task_message(context, assignment, view=view, **group_skip),
+        _refresh_personal_task_message(context, assignment, view=view, **personal_skip),
+    ]
+    if chat_id is not None and message_id is not None:
+        _edit_scheduler(context.application).schedule(chat_id, message_id, edit_tapped)
+    else:  # nothing to key the edit on, send it right away
+        edits.append(edit_tapped())
+    await _run_isolated(*edits)
+
+
+def _context_for(app, chat_id: int | None = None, user_id: int | None = None) -> AppContext:
+    # Chats and people no household claims get the default one.
+    tenants = app.bot_data.get("tenants")
+    ctx = tenants.resolve(chat_id, user_id) if tenants is not None else None
+    if ctx is None:
+        ctx = app.bot_data["app_context"]
+    return ctx
+
+
+def _outbound(app) -> OutboundQueue:
+    queue = app.bot_data.get("outbound")
+    if queue is None:
+        queue = app.bot_data["outbound"] = OutboundQueue()
+    return queue
+
+
+def _message_chat_id(message) -> int | None:
+    chat_id = getattr(message, "chat_id", None)
+    if chat_id is None:
+        chat_id = getattr(getattr(message, "chat", None), "id", None)
+    return chat_id
+
+
+def _broadcasts(app) -> BroadcastEngine:
+    engine = app.bot_data.get("broadcasts")
+    if engine is None:
+        engine = app.bot_data["broadcasts"] = BroadcastEngine()
+    return engine
+
 
-async def send_daily_notifications(app) -> None:
+def _edit_scheduler(app) -> EditScheduler:
+    scheduler = app.bot_data.get("edit_scheduler")
+    if scheduler is None:
+        scheduler = app.bot_data["edit_scheduler"] = EditScheduler(window=DEFAULT_EDIT_WINDOW)
+    return scheduler
+
+
+async def _edit_if_changed(app, message_ref, text: str, keyboard, call):
+    # Skips the request when the message already shows this text and keyboard;
+    # Telegram would only answer "message is not modified".
+    from telegram.error import BadRequest
+
+    fingerprint = content_fingerprint(text, keyboard)
+    if message_ref.fingerprint == fingerprint:
+        return UNCHANGED
+    try:
+        await _outbound(app).send(message_ref.chat_id, call)
+    except BadRequest as exc:
+        if "message is not modified" not in str(exc).lower():
+            raise
+        message_ref.fingerprint = fingerprint
+        return UNCHANGED
+    message_ref.fingerprint = fingerprint
+    return None
+
+
+async def _run_isolated(*aws) -> None:
+    results = await asyncio.gather(*aws, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Failed to update task message", exc_info=result)
+
+
+async def send_daily_notifications(app, ctx: AppContext | None = None) -> None:
     from telegram.constants import ParseMode
 
-    ctx: AppContext = app.bot_data["app_context"]
+    ctx = ctx or app.bot_data["app_context"]
     today = datetime.now().date()
-    assignments_by_user = ensure_assignments_for_date(ctx, today)
+    assignments_by_user = await ensure_assignments(ctx, today)
     group_chat_id = ctx.config.bot.group_chat_id
 
-    greeting = build_morning_greeting(today)
-    await app.bot.send_message(
-        chat_id=group_chat_id,
-        text=greeting,
-        parse_mode=ParseMode.MARKDOWN,
-    )
+    outbound = _outbound(app)
+
+    async def broadcast(**kwargs):
+        return await outbound.send(
+            group_chat_id,
+            lambda: app.bot.send_message(
+                chat_id=group_chat_id, parse_mode=ParseMode.MARKDOWN, **kwargs
+            ),
+            priority=PRIORITY_BROADCAST,
+        )
+
+    await broadcast(text=build_morning_greeting(today))
 
     sent_any = False
     for block in build_group_blocks(ctx, assignments_by_user, today):
-        sent_message = await app.bot.send_message(
-            chat_id=group_chat_id,
-            text=block.text,
-            reply_markup=block.keyboard,
-            parse_mode=ParseMode.MARKDOWN,
+        sent_message = await broadcast(text=block.text, reply_markup=block.keyboard)
+        await _store_group_task_message(
+            app,
+            today,
+            block.user_id,
+            sent_message,
+            fingerprint=content_fingerprint(block.text, block.keyboard),
         )
-        _store_group_task_message(app, today, block.user_id, sent_message)
         sent_any = True
 
     if not sent_any:
-        await app.bot.send_message(
-            chat_id=group_chat_id,
-            text="Сегодня задач нет.",
-            parse_mode=ParseMode.MARKDOWN,
-        )
+        await broadcast(text="Сегодня задач нет.")
 
 
-async def send_evening_reminders(app) -> None:
+async def send_evening_reminders(app, ctx: AppContext | None = None) -> None:
     from telegram.constants import ParseMode
 
-    ctx: AppContext = app.bot_data["app_context"]
+    ctx = ctx or app.bot_data["app_context"]
     today = datetime.now().date()
-    for user in ctx.users:
-        incomplete = ctx.db.list_incomplete_for_user(today, user.telegram_id)
-        if not incomplete:
-            continue
-        levels_line = format_levels_line(incomplete)
-        parts = ["Напоминаю, что сегодня ещё есть невыполненные задачи:"]
-        if levels_line:
-            parts.append(levels_line)
-        parts.append(format_assignments(incomplete))
-        text = "\n".join(parts)
-        keyboard = build_keyboard(incomplete)
-        sent_message = await app.bot.send_message(
-            chat_id=user.telegram_id,
-            text=text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard,
+    incomplete_by_user = _group_by_user(
+        await ctx.storage.list_incomplete(today, household=ctx.household)
+    )
+    outbound = _outbound(app)
+
+    async def remind(user_id: int) -> None:
+        view = _render_task_view(ctx, today, user_id, incomplete_by_user[user_id])
+        text, keyboard = view.reminder_text, view.keyboard
+        sent_message = await outbound.send(
+            user_id,
+            lambda: app.bot.send_message(
+                chat_id=user_id,
+                text=text,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=keyboard,
+            ),
+            priority=PRIORITY_BROADCAST,
+        )
+        await _store_personal_task_message(
+            app, today, user_id, sent_message, fingerprint=content_fingerprint(text, keyboard)
         )
-        _store_personal_task_message(app, today, user.telegram_id, sent_message)
+
+    await _broadcasts(app).run(
+        f"evening_reminder:{ctx.household}@{datetime.now().isoformat(timespec='seconds')}",
+        [user_id for user_id in incomplete_by_user if user_id in ctx.directory.by_id],
+        remind,
+        concurrency=REMINDER_CONCURRENCY,
+    )
 
 
-async def send_daily_report(app) -> None:
+async def send_daily_report(app, ctx: AppContext | None = None) -> None:
     from telegram.constants import ParseMode
 
-    ctx: AppContext = app.bot_data["app_context"]
+    ctx = ctx or app.bot_data["app_context"]
     today = datetime.now().date()
-    rows = ctx.db.daily_stats(today, today)
+    rows = await ctx.storage.daily_stats(today, today, household=ctx.household)
     report = format_daily_report(today, rows)
-    await app.bot.send_message(
-        chat_id=ctx.config.bot.group_chat_id,
-        text=report,
-        parse_mode=ParseMode.MARKDOWN,
+    group_chat_id = ctx.config.bot.group_chat_id
+    await _outbound(app).send(
+        group_chat_id,
+        lambda: app.bot.send_message(
+            chat_id=group_chat_id,
+            text=report,
+            parse_mode=ParseMode.MARKDOWN,
+        ),
+        priority=PRIORITY_BROADCAST,
+    )
+
+
+async def broadcast_to_households(
+    app,
+    job: Callable[..., Awaitable[None]],
+    contexts: Sequence[AppContext],
+    job_id: str | None = None,
+) -> BroadcastSummary:
+    # One scheduled run covers every household due at that time; each of them
+    # generates, renders and sends on its own, a failing one is only counted.
+    # The start time keeps runs of one job apart in the progress map.
+    by_household = {ctx.household: ctx for ctx in contexts}
+    name = f"{job_id or job.__name__}@{datetime.now().isoformat(timespec='seconds')}"
+    return await _broadcasts(app).run(
+        name, list(by_household), lambda household: job(app, by_household[household])
+    )
+
+
+async def pregenerate_assignments(app, ctx: AppContext | None = None) -> None:
+    # Runs in quiet hours so the morning broadcast and /tasks only read.
+    ctx = ctx or app.bot_data["app_context"]
+    today = datetime.now().date()
+    for offset in range(ctx.config.scheduler.pregenerate_days + 1):
+        target = today + timedelta(days=offset)
+        try:
+            await ensure_assignments(ctx, target)
+        except Exception:  # noqa: BLE001 - the next day may still succeed
+            logger.exception("Failed to pre-generate assignments for %s", target)
+
+
+async def load_task_messages(app) -> None:
+    # Restores the refreshable messages of recent days after a restart.
+    ctx: AppContext = app.bot_data["app_context"]
+    cutoff = _task_message_cutoff(ctx)
+    await ctx.storage.prune_task_messages(cutoff)
+    group_store = _group_task_message_store(app)
+    personal_store = _personal_task_message_store(app)
+    for message in await ctx.storage.list_task_messages(cutoff):
+        key = (message.task_date.isoformat(), message.user_id)
+        if message.kind == TASK_MESSAGE_GROUP:
+            group_store[key] = GroupTaskMessage(message.chat_id, message.message_id)
+        elif message.kind == TASK_MESSAGE_PERSONAL:
+            personal_store[key] = PersonalTaskMessage(message.chat_id, message.message_id)
+
+
+async def prune_task_messages(app) -> None:
+    ctx: AppContext = app.bot_data["app_context"]
+    cutoff = _task_message_cutoff(ctx)
+    for store_key in ("group_task_messages", "personal_task_messages"):
+        store = app.bot_data.get(store_key) or {}
+        for key in [key for key in store if date.fromisoformat(key[0]) < cutoff]:
+            del store[key]
+    await ctx.storage.prune_task_messages(cutoff)
+
+
+def _task_message_cutoff(ctx: AppContext) -> date:
+    return datetime.now().date() - timedelta(days=ctx.config.database.task_message_days)
+
+
+async def ensure_assignments(ctx: AppContext, target: date) -> Dict[int, List[Assignment]]:
+    # /tasks and the morning job may ask for an ungenerated day at the same
+    # moment; they share one generation pass instead of queueing two.
+    return await ctx.generations.run(
+        (ctx.household, target),
+        lambda: ctx.storage.run_write(ensure_assignments_for_date, ctx, target),
     )
 
 
 def ensure_assignments_for_date(ctx: AppContext, target: date) -> Dict[int, List[Assignment]]:
-    assignments = ctx.db.list_assignments(target)
+    assignments = ctx.db.list_assignments(target, household=ctx.household)
     if assignments:
         return _group_by_user(assignments)
 
     levels = expand_levels(get_day_levels(target, ctx.config.scheduler))
     rooms = list(ctx.tasks.keys())
     week_index = weeks_between(ctx.config.scheduler.rotation_start, target)
-    room_rotation = rotate_rooms(ctx.users, rooms, week_index, target.weekday())
+    users = ctx.directory.users
+    room_rotation = rotate_rooms(users, rooms, week_index, target.weekday())
 
-    for user in ctx.users:
+    planned: List[PlannedAssignment] = []
+    for user in users:
         assigned_rooms = room_rotation.get(user.telegram_id, [])
         for room in assigned_rooms:
             for level in levels:
                 room_tasks = ctx.tasks[room].get(level, [])
                 for description in room_tasks:
-                    ctx.db.add_assignment(target, user.telegram_id, room, level, description)
+                    planned.append((user.telegram_id, room, level, description))
 
-    assignments = ctx.db.list_assignments(target)
+    assignments = ctx.db.add_assignments_bulk(target, planned, household=ctx.household)
     return _group_by_user(assignments)
 
 
@@ -494,18 +785,13 @@ def build_group_blocks(
     ctx: AppContext, assignments_by_user: Dict[int, List[Assignment]], task_date: date
 ) -> List[GroupBlock]:
     blocks: List[GroupBlock] = []
-    for user in ctx.users:
+    for user in ctx.directory.users:
         assignments = assignments_by_user.get(user.telegram_id, [])
         if not assignments:
             continue
-        text = build_personal_message(assignments, task_date)
-        keyboard = build_keyboard(assignments)
+        view = _render_task_view(ctx, task_date, user.telegram_id, assignments)
         blocks.append(
-            GroupBlock(
-                text=f"*{user.name}*\n{text}",
-                keyboard=keyboard,
-                user_id=user.telegram_id,
-            )
+            GroupBlock(text=view.group_text, keyboard=view.keyboard, user_id=user.telegram_id)
         )
     return blocks
 
@@ -530,11 +816,28 @@ def build_personal_message(
     return "\n".join(parts)
 
 
-def build_keyboard(assignments: List[Assignment]):
+def build_reminder_message(assignments: List[Assignment]) -> str:
+    remaining = [a for a in assignments if not a.completed]
+    if not remaining:
+        return "Все задачи на сегодня выполнены! 🎉"
+    parts = ["Напоминаю, что сегодня ещё есть невыполненные задачи:"]
+    levels_line = format_levels_line(remaining)
+    if levels_line:
+        parts.append(levels_line)
+    parts.append(format_assignments(remaining))
+    return "\n".join(parts)
+
+
+def build_keyboard(assignments: List[Assignment], *, signer: CallbackSigner | None = None):
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+    def callback_data(assignment: Assignment) -> str:
+        if signer is None:
+            return f"{TASK_DONE_PREFIX}{assignment.id}"
+        return signer.encode(assignment.id, assignment.user_id, assignment.task_date)
+
     buttons = [
-        [InlineKeyboardButton(text=f"✅ {a.room}: {a.description}", callback_data=f"task_done:{a.id}")]
+        [InlineKeyboardButton(text=f"✅ {a.room}: {a.description}", callback_data=callback_data(a))]
         for a in assignments
         if not a.completed
     ]
@@ -547,42 +850,80 @@ def _group_task_message_store(app: "Application") -> Dict[Tuple[str, int], Group
     return app.bot_data.setdefault("group_task_messages", {})
 
 
-def _store_group_task_message(app, task_date: date, user_id: int, message) -> None:
+async def _store_group_task_message(
+    app, task_date: date, user_id: int, message, *, fingerprint: str | None = None
+) -> None:
     if not message:
         return
     store = _group_task_message_store(app)
     store[(task_date.isoformat(), user_id)] = GroupTaskMessage(
         chat_id=message.chat_id,
         message_id=message.message_id,
+        fingerprint=fingerprint,
+    )
+    await app.bot_data["app_context"].storage.save_task_message(
+        TaskMessage(
+            kind=TASK_MESSAGE_GROUP,
+            task_date=task_date,
+            user_id=user_id,
+            chat_id=message.chat_id,
+            message_id=message.message_id,
+        )
     )
 
 
-def _remove_group_task_message(app, task_date: date, user_id: int) -> None:
+def _message_is_gone(exc: Exception) -> bool:
+    # Timeouts, network errors and exhausted retries keep the message: the
+    # next completion tries again.
+    from telegram.error import BadRequest
+
+    return isinstance(exc, BadRequest) and any(
+        text in str(exc).lower() for text in GONE_MESSAGE_ERRORS
+    )
+
+
+async def _remove_group_task_message(app, task_date: date, user_id: int) -> None:
     store = app.bot_data.get("group_task_messages")
-    if not store:
-        return
-    store.pop((task_date.isoformat(), user_id), None)
+    if store:
+        store.pop((task_date.isoformat(), user_id), None)
+    await app.bot_data["app_context"].storage.delete_task_message(
+        TASK_MESSAGE_GROUP, task_date, user_id
+    )
 
 
-def _build_task_view(
+async def _build_task_view(
     app_ctx: AppContext, task_date: date, user_id: int
 ) -> TaskView:
-    assignments = app_ctx.db.list_assignments_for_user(task_date, user_id)
-    personal_text = build_personal_message(assignments, task_date)
-    owner_name = next(
-        (u.name for u in app_ctx.users if u.telegram_id == user_id),
-        "",
+    assignments = await app_ctx.storage.list_assignments_for_user(task_date, user_id)
+    return _render_task_view(app_ctx, task_date, user_id, assignments)
+
+
+def _render_task_view(
+    app_ctx: AppContext, task_date: date, user_id: int, assignments: List[Assignment]
+) -> TaskView:
+    # The same completion state renders to the same texts and keyboard, so the
+    # group, personal and reminder messages share one build.
+    return app_ctx.views.get_or_render(
+        view_key(user_id, task_date, assignments),
+        lambda: _build_view(app_ctx, task_date, user_id, assignments),
     )
+
+
+def _build_view(
+    app_ctx: AppContext, task_date: date, user_id: int, assignments: List[Assignment]
+) -> TaskView:
+    personal_text = build_personal_message(assignments, task_date)
+    owner_name = app_ctx.directory.name_of(user_id)
     if owner_name:
         group_text = f"*{owner_name}*\n{personal_text}"
     else:
         group_text = personal_text
-    keyboard = build_keyboard(assignments)
     return TaskView(
         assignments=assignments,
         personal_text=personal_text,
         group_text=group_text,
-        keyboard=keyboard,
+        reminder_text=build_reminder_message(assignments),
+        keyboard=build_keyboard(assignments, signer=app_ctx.callbacks),
     )
 
 
@@ -601,9 +942,9 @@ async def _refresh_group_task_message(
     if not message_ref:
         return
 
-    app_ctx: AppContext = app.bot_data["app_context"]
+    app_ctx = _context_for(app, user_id=assignment.user_id)
     if view is None:
-        view = _build_task_view(app_ctx, assignment.task_date, assignment.user_id)
+        view = await _build_task_view(app_ctx, assignment.task_date, assignment.user_id)
     if (
         skip_message_id is not None
         and message_ref.message_id == skip_message_id
@@ -614,39 +955,64 @@ async def _refresh_group_task_message(
     keyboard = view.keyboard
 
     from telegram.constants import ParseMode
-    from telegram.error import TelegramError
 
-    try:
-        await app.bot.edit_message_text(
-            chat_id=message_ref.chat_id,
-            message_id=message_ref.message_id,
-            text=text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard,
+    async def edit():
+        return await _edit_if_changed(
+            app,
+            message_ref,
+            text,
+            keyboard,
+            lambda: app.bot.edit_message_text(
+                chat_id=message_ref.chat_id,
+                message_id=message_ref.message_id,
+                text=text,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=keyboard,
+            ),
         )
-    except TelegramError:  # pragma: no cover - depends on Telegram API errors
-        _remove_group_task_message(app, assignment.task_date, assignment.user_id)
+
+    async def forget(exc: Exception) -> None:
+        if _message_is_gone(exc):
+            await _remove_group_task_message(app, assignment.task_date, assignment.user_id)
+
+    _edit_scheduler(app).schedule(
+        message_ref.chat_id, message_ref.message_id, edit, on_error=forget
+    )
 
 
 def _personal_task_message_store(app: "Application") -> Dict[Tuple[str, int], PersonalTaskMessage]:
     return app.bot_data.setdefault("personal_task_messages", {})
 
 
-def _store_personal_task_message(app, task_date: date, user_id: int, message) -> None:
+async def _store_personal_task_message(
+    app, task_date: date, user_id: int, message, *, fingerprint: str | None = None
+) -> None:
     if not message:
         return
     store = _personal_task_message_store(app)
     store[(task_date.isoformat(), user_id)] = PersonalTaskMessage(
         chat_id=message.chat_id,
         message_id=message.message_id,
+        fingerprint=fingerprint,
+    )
+    await app.bot_data["app_context"].storage.save_task_message(
+        TaskMessage(
+            kind=TASK_MESSAGE_PERSONAL,
+            task_date=task_date,
+            user_id=user_id,
+            chat_id=message.chat_id,
+            message_id=message.message_id,
+        )
     )
 
 
-def _remove_personal_task_message(app, task_date: date, user_id: int) -> None:
+async def _remove_personal_task_message(app, task_date: date, user_id: int) -> None:
     store = app.bot_data.get("personal_task_messages")
-    if not store:
-        return
-    store.pop((task_date.isoformat(), user_id), None)
+    if store:
+        store.pop((task_date.isoformat(), user_id), None)
+    await app.bot_data["app_context"].storage.delete_task_message(
+        TASK_MESSAGE_PERSONAL, task_date, user_id
+    )
 
 
 async def _refresh_personal_task_message(
@@ -664,9 +1030,9 @@ async def _refresh_personal_task_message(
     if not message_ref:
         return
 
-    app_ctx: AppContext = app.bot_data["app_context"]
+    app_ctx = _context_for(app, user_id=assignment.user_id)
     if view is None:
-        view = _build_task_view(app_ctx, assignment.task_date, assignment.user_id)
+        view = await _build_task_view(app_ctx, assignment.task_date, assignment.user_id)
     if (
         skip_message_id is not None
         and message_ref.message_id == skip_message_id
@@ -677,25 +1043,36 @@ async def _refresh_personal_task_message(
     keyboard = view.keyboard
 
     from telegram.constants import ParseMode
-    from telegram.error import TelegramError
 
-    try:
-        await app.bot.edit_message_text(
-            chat_id=message_ref.chat_id,
-            message_id=message_ref.message_id,
-            text=text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard,
+    async def edit():
+        return await _edit_if_changed(
+            app,
+            message_ref,
+            text,
+            keyboard,
+            lambda: app.bot.edit_message_text(
+                chat_id=message_ref.chat_id,
+                message_id=message_ref.message_id,
+                text=text,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=keyboard,
+            ),
         )
-    except TelegramError:  # pragma: no cover - depends on Telegram API errors
-        _remove_personal_task_message(app, assignment.task_date, assignment.user_id)
+
+    async def forget(exc: Exception) -> None:
+        if _message_is_gone(exc):
+            await _remove_personal_task_message(app, assignment.task_date, assignment.user_id)
+
+    _edit_scheduler(app).schedule(
+        message_ref.chat_id, message_ref.message_id, edit, on_error=forget
+    )
 
 
 def build_group_summary(
     ctx: AppContext, assignments_by_user: Dict[int, List[Assignment]], task_date: date
 ) -> str:
     lines = [f"📅 Задачи на {task_date.strftime('%d.%m.%Y')}"]
-    for user in ctx.users:
+    for user in ctx.directory.users:
         assignments = assignments_by_user.get(user.telegram_id, [])
         summary = format_user_summary(assignments)
         lines.append(f"• *{user.name}*: {summary}")
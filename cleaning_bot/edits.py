@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EDIT_WINDOW = 1.0
+
+MessageKey = Tuple[int, int]  # (chat_id, message_id)
+
+# Returned by an edit that found the message already showing its content.
+UNCHANGED = object()
+
+
+@dataclass
+class _PendingEdit:
+    edit: Callable[[], Awaitable[Any]]
+    on_error: Optional[Callable[[Exception], Any]]
+    waiters: List["asyncio.Future[bool]"] = field(default_factory=list)
+
+
+class EditScheduler:
+    # Collapses edits of the same message: only the latest requested state is
+    # kept, the first edit goes out immediately and later ones at most once per
+    # `window` seconds, so a burst of taps ends in exactly one edit carrying the
+    # final state. Different messages never wait for each other.
+
+    def __init__(self, *, window: float = DEFAULT_EDIT_WINDOW):
+        if window < 0:
+            raise ValueError("window must not be negative")
+        self.window = window
+        self.sent = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self._pending: Dict[MessageKey, _PendingEdit] = {}
+        self._inflight: Dict[MessageKey, _PendingEdit] = {}
+        self._workers: Dict[MessageKey, "asyncio.Task[None]"] = {}
+
+    def schedule(
+        self,
+        chat_id: int,
+        message_id: int,
+        edit: Callable[[], Awaitable[Any]],
+        *,
+        on_error: Optional[Callable[[Exception], Any]] = None,
+    ) -> "asyncio.Future[bool]":
+        # `edit` is only called if no newer edit for the message replaces it and
+        # may return UNCHANGED when it skipped the call to Telegram;
+        # `on_error` may be a plain function or a coroutine function.
+        # The returned future resolves to True once this state (or a newer one)
+        # is on screen and to False if that edit failed.
+        loop = asyncio.get_running_loop()
+        key = (chat_id, message_id)
+        waiter: "asyncio.Future[bool]" = loop.create_future()
+        pending = _PendingEdit(edit, on_error, [waiter])
+        previous = self._pending.get(key)
+        if previous is not None:
+            self.coalesced += 1
+            pending.waiters[:0] = previous.waiters
+        self._pending[key] = pending
+        if key not in self._workers:
+            self._workers[key] = loop.create_task(self._run(key))
+        return waiter
+
+    async def drain(self) -> None:
+        # Waits until every scheduled state has been delivered (or has failed).
+        while self._pending or self._inflight:
+            edits = [*self._pending.values(), *self._inflight.values()]
+            await asyncio.gather(*(waiter for item in edits for waiter in item.waiters))
+
+    async def _run(self, key: MessageKey) -> None:
+        try:
+            while key in self._pending:
+                pending = self._inflight[key] = self._pending.pop(key)
+                try:
+                    called = await self._deliver(key, pending)
+                finally:
+                    del self._inflight[key]
+                if called:
+                    # stay alive for one window so edits arriving meanwhile wait
+                    await asyncio.sleep(self.window)
+        finally:
+            self._workers.pop(key, None)
+
+    async def _deliver(self, key: MessageKey, pending: _PendingEdit) -> bool:
+        # Returns whether Telegram was called.
+        try:
+            outcome = await pending.edit()
+        except Exception as exc:  # noqa: BLE001 - one message must not break the others
+            chat_id, message_id = key
+            logger.warning("Failed to edit message %s in chat %s", message_id, chat_id, exc_info=exc)
+            if pending.on_error is not None:
+                try:
+                    outcome = pending.on_error(exc)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                except Exception:  # noqa: BLE001 - keep the worker alive
+                    logger.exception("Edit error handler failed")
+            _resolve(pending.waiters, False)
+            return True
+        _resolve(pending.waiters, True)
+        if outcome is UNCHANGED:
+            self.unchanged += 1
+            return False
+        self.sent += 1
+        return True
+
+
+def _resolve(waiters: List["asyncio.Future[bool]"], value: bool) -> None:
+    for waiter in waiters:
+        if not waiter.done():
+            waiter.set_result(value)
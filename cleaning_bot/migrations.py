@@ -0,0 +1,396 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from .rotation import LEVEL_ORDER
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            telegram_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_date TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            room TEXT NOT NULL,
+            level TEXT NOT NULL,
+            description TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            completed_at TEXT,
+            UNIQUE(task_date, user_id, room, level, description),
+            FOREIGN KEY(user_id) REFERENCES users(telegram_id)
+        )
+        """
+    )
+
+
+def _index_assignments_by_completion(conn: sqlite3.Connection) -> None:
+    # Serves list_incomplete_for_user and covers per-day aggregation over
+    # assignments (used to backfill the stats rollup).
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_assignments_date_user_completed
+        ON assignments(task_date, user_id, completed)
+        """
+    )
+
+
+def _create_stats_rollup(conn: sqlite3.Connection) -> None:
+    # Per-user daily counters kept in sync by triggers, so they change in the
+    # same transaction as the assignment rows (including manual edits).
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_user_stats (
+            task_date TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (task_date, user_id)
+        ) WITHOUT ROWID
+        """
+    )
+    _create_stats_triggers(conn)
+    _backfill_stats_rollup(conn)
+
+
+def _create_stats_triggers(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_assignments_stats_insert
+        AFTER INSERT ON assignments
+        BEGIN
+            INSERT INTO daily_user_stats(task_date, user_id, completed, total)
+            VALUES(NEW.task_date, NEW.user_id, NEW.completed != 0, 1)
+            ON CONFLICT(task_date, user_id) DO UPDATE SET
+                completed = completed + excluded.completed,
+                total = total + 1;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_assignments_stats_update
+        AFTER UPDATE OF task_date, user_id, completed ON assignments
+        BEGIN
+            UPDATE daily_user_stats
+            SET completed = completed - (OLD.completed != 0), total = total - 1
+            WHERE task_date = OLD.task_date AND user_id = OLD.user_id;
+            INSERT INTO daily_user_stats(task_date, user_id, completed, total)
+            VALUES(NEW.task_date, NEW.user_id, NEW.completed != 0, 1)
+            ON CONFLICT(task_date, user_id) DO UPDATE SET
+                completed = completed + excluded.completed,
+                total = total + 1;
+            DELETE FROM daily_user_stats
+            WHERE task_date = OLD.task_date AND user_id = OLD.user_id AND total <= 0;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_assignments_stats_delete
+        AFTER DELETE ON assignments
+        BEGIN
+            UPDATE daily_user_stats
+            SET completed = completed - (OLD.completed != 0), total = total - 1
+            WHERE task_date = OLD.task_date AND user_id = OLD.user_id;
+            DELETE FROM daily_user_stats
+            WHERE task_date = OLD.task_date AND user_id = OLD.user_id AND total <= 0;
+        END
+        """
+    )
+
+
+def _backfill_stats_rollup(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM daily_user_stats")
+    conn.execute(
+        """
+        INSERT INTO daily_user_stats(task_date, user_id, completed, total)
+        SELECT task_date, user_id, SUM(completed != 0), COUNT(*)
+        FROM assignments
+        GROUP BY task_date, user_id
+        """
+    )
+
+
+def _compact_assignment_columns(conn: sqlite3.Connection) -> None:
+    # task_date becomes days since 1970-01-01, level an index into LEVEL_ORDER
+    # and completed_at unix seconds (UTC). The table is rebuilt because SQLite
+    # cannot change column types in place; dropping it also drops its index and
+    # triggers, which are recreated below.
+    level_case = " ".join("WHEN ? THEN ?" for _ in LEVEL_ORDER)
+    level_params = [value for code, level in enumerate(LEVEL_ORDER) for value in (level, code)]
+    unknown = conn.execute(
+        f"SELECT DISTINCT level FROM assignments WHERE (CASE level {level_case} END) IS NULL",
+        level_params,
+    ).fetchall()
+    if unknown:
+        raise ValueError(
+            "Unknown levels in assignments: " + ", ".join(str(row[0]) for row in unknown)
+        )
+
+    conn.execute(
+        """
+        CREATE TABLE assignments_compact (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_date INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            room TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            completed_at INTEGER,
+            UNIQUE(task_date, user_id, room, level, description),
+            FOREIGN KEY(user_id) REFERENCES users(telegram_id)
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        INSERT INTO assignments_compact(
+            id, task_date, user_id, room, level, description, completed, completed_at
+        )
+        SELECT id,
+               CAST(julianday(task_date) - 2440587.5 AS INTEGER),
+               user_id,
+               room,
+               CASE level {level_case} END,
+               description,
+               completed,
+               CAST(strftime('%s', completed_at) AS INTEGER)
+        FROM assignments
+        """,
+        level_params,
+    )
+    conn.execute("DROP TABLE assignments")
+    conn.execute("ALTER TABLE assignments_compact RENAME TO assignments")
+    _index_assignments_by_completion(conn)
+
+    conn.execute("DROP TABLE daily_user_stats")
+    conn.execute(
+        """
+        CREATE TABLE daily_user_stats (
+            task_date INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (task_date, user_id)
+        ) WITHOUT ROWID
+        """
+    )
+    _create_stats_triggers(conn)
+    _backfill_stats_rollup(conn)
+
+
+def _extract_task_catalog(conn: sqlite3.Connection) -> None:
+    # Room, level and description move to task_catalog; each assignment keeps
+    # only the catalog id, which also shrinks the uniqueness index.
+    conn.execute(
+        """
+        CREATE TABLE task_catalog (
+            id INTEGER PRIMARY KEY,
+            room TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            UNIQUE(room, level, description)
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO task_catalog(room, level, description)
+        SELECT DISTINCT room, level, description
+        FROM assignments
+        ORDER BY room, level, description
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE assignments_by_task (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_date INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            completed_at INTEGER,
+            UNIQUE(task_date, user_id, task_id),
+            FOREIGN KEY(user_id) REFERENCES users(telegram_id),
+            FOREIGN KEY(task_id) REFERENCES task_catalog(id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO assignments_by_task(id, task_date, user_id, task_id, completed, completed_at)
+        SELECT a.id, a.task_date, a.user_id, t.id, a.completed, a.completed_at
+        FROM assignments a
+        JOIN task_catalog t
+          ON t.room = a.room AND t.level = a.level AND t.description = a.description
+        """
+    )
+    conn.execute("DROP TABLE assignments")
+    conn.execute("ALTER TABLE assignments_by_task RENAME TO assignments")
+    _index_assignments_by_completion(conn)
+    _create_stats_triggers(conn)
+
+
+def _create_task_messages(conn: sqlite3.Connection) -> None:
+    # Messages that are edited when a task is completed. The key leads with the
+    # date, so loading recent days and pruning old ones are index range scans.
+    conn.execute(
+        """
+        CREATE TABLE task_messages (
+            task_date INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            PRIMARY KEY (task_date, user_id, kind)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _scope_by_household(conn: sqlite3.Connection) -> None:
+    # Several households share one file. Only users carry the household;
+    # assignments reach it through user_id, so their rows stay small.
+    conn.execute("ALTER TABLE users ADD COLUMN household TEXT NOT NULL DEFAULT 'default'")
+    conn.execute("CREATE INDEX idx_users_household ON users(household, telegram_id)")
+
+
+# Ordered list of schema changes. Never edit a released step: append a new one.
+# The first steps are idempotent so databases created before versioning
+# (user_version 0) upgrade in place.
+MIGRATIONS: Sequence[Migration] = (
+    Migration(1, "create users and assignments tables", _create_base_tables),
+    Migration(
+        2,
+        "index assignments by date, user and completion",
+        _index_assignments_by_completion,
+    ),
+    Migration(3, "add daily_user_stats rollup maintained by triggers", _create_stats_rollup),
+    Migration(
+        4,
+        "store dates, levels and timestamps in assignments as integers",
+        _compact_assignment_columns,
+    ),
+    Migration(5, "move task texts into task_catalog", _extract_task_catalog),
+    Migration(6, "track task messages to refresh in task_messages", _create_task_messages),
+    Migration(7, "scope users by household", _scope_by_household),
+)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def pending_migrations(
+    conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS
+) -> List[Migration]:
+    _validate(migrations)
+    current = schema_version(conn)
+    latest = migrations[-1].version if migrations else 0
+    if current > latest:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than supported version {latest}"
+        )
+    return [migration for migration in migrations if migration.version > current]
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    migrations: Sequence[Migration] = MIGRATIONS,
+    *,
+    dry_run: bool = False,
+) -> List[Migration]:
+    pending = pending_migrations(conn, migrations)
+    if conn.in_transaction:
+        conn.commit()
+
+    if dry_run:
+        # Apply every pending step against the real schema, then roll back.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for migration in pending:
+                migration.apply(conn)
+        finally:
+            conn.rollback()
+        return pending
+
+    applied = []
+    for migration in pending:
+        # Each step commits together with its version bump; a failing step
+        # leaves the database at the previous version.
+        conn.execute("BEGIN IMMEDIATE")
+        # Another process may have applied the step while we waited for the lock.
+        if schema_version(conn) >= migration.version:
+            conn.rollback()
+            continue
+        try:
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append(migration)
+    return applied
+
+
+def _validate(migrations: Sequence[Migration]) -> None:
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)) or (versions and versions[0] <= 0):
+        raise ValueError("Migration versions must be positive, unique and ordered")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument(
+        "database",
+        nargs="?",
+        default=os.environ.get("DATABASE_PATH", "db.sqlite3"),
+        help="Path to the SQLite database (defaults to $DATABASE_PATH)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Apply pending migrations inside a transaction and roll them back",
+    )
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(Path(args.database))
+    try:
+        before = schema_version(conn)
+        applied = migrate(conn, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    if not applied:
+        print(f"Schema is up to date (version {before})")
+        return
+    verb = "Would apply" if args.dry_run else "Applied"
+    for migration in applied:
+        print(f"{verb} {migration.version}: {migration.description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BROADCAST = 1
+
+# Telegram allows about 30 messages per second overall, one per second in a
+# private chat and 20 per minute in a group.
+GLOBAL_RATE = 30.0
+PRIVATE_CHAT_RATE = 1.0
+PRIVATE_CHAT_BURST = 3
+GROUP_CHAT_RATE = 20 / 60
+GROUP_CHAT_BURST = 20
+DEFAULT_MAX_RETRIES = 3
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, *, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def delay(self) -> float:
+        # Seconds until a token is available, 0 if one can be taken now.
+        now = self._refill()
+        wait = max(0.0, self._blocked_until - now)
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.rate)
+        return wait
+
+    def take(self) -> None:
+        self._refill()
+        self._tokens -= 1
+
+    def block(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def idle(self) -> bool:
+        now = self._refill()
+        return self._tokens >= self.capacity and now >= self._blocked_until
+
+    def _refill(self) -> float:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+
+@dataclass(order=True)
+class _Request:
+    priority: int
+    sequence: int
+    chat_id: Optional[int] = field(compare=False)
+    call: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: "asyncio.Future[Any]" = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class OutboundQueue:
+    # Every Telegram send or edit goes through here. Requests wait for a token
+    # from their chat's bucket and from the global bucket; interactive replies
+    # overtake queued broadcasts, and a RetryAfter pauses only the chat it came
+    # from before the request is retried.
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = GLOBAL_RATE,
+        private_rate: float = PRIVATE_CHAT_RATE,
+        private_burst: float = PRIVATE_CHAT_BURST,
+        group_rate: float = GROUP_CHAT_RATE,
+        group_burst: float = GROUP_CHAT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_retries = max_retries
+        self.sent = 0
+        self.retried = 0
+        self._clock = clock
+        self._private = (private_rate, private_burst)
+        self._group = (group_rate, group_burst)
+        self._global = TokenBucket(global_rate, max(global_rate, 1), clock=clock)
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._queue: List[_Request] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._running: Set["asyncio.Task[None]"] = set()
+
+    async def send(
+        self,
+        chat_id: Optional[int],
+        call: Callable[[], Awaitable[Any]],
+        *,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Any:
+        # `call` starts the request and may be invoked again after RetryAfter.
+        loop = asyncio.get_running_loop()
+        request = _Request(priority, next(self._sequence), chat_id, call, loop.create_future())
+        self._enqueue(request)
+        return await request.future
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def _enqueue(self, request: _Request) -> None:
+        self._queue.append(request)
+        if self._worker is None:
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        try:
+            while self._queue:
+                delay = self._dispatch_ready()
+                if delay is None:
+                    continue
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._worker = None
+            self._buckets = {
+                chat_id: bucket for chat_id, bucket in self._buckets.items() if not bucket.idle()
+            }
+
+    def _dispatch_ready(self) -> Optional[float]:
+        # Starts the most urgent request whose chat is not throttled. Returns
+        # None if one was started, otherwise how long to wait before retrying.
+        global_delay = self._global.delay()
+        if global_delay > 0:
+            return global_delay
+        wait: Optional[float] = None
+        for request in sorted(self._queue):
+            bucket = self._bucket(request.chat_id)
+            delay = bucket.delay() if bucket is not None else 0.0
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            self._queue.remove(request)
+            self._global.take()
+            if bucket is not None:
+                bucket.take()
+            task = asyncio.get_running_loop().create_task(self._deliver(request))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            return None
+        return wait
+
+    def _bucket(self, chat_id: Optional[int]) -> Optional[TokenBucket]:
+        if chat_id is None:
+            return None
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            rate, burst = self._group if chat_id < 0 else self._private
+            bucket = self._buckets[chat_id] = TokenBucket(rate, burst, clock=self._clock)
+        return bucket
+
+    async def _deliver(self, request: _Request) -> None:
+        from telegram.error import RetryAfter
+
+        if request.future.done():  # the caller gave up while it was queued
+            return
+        request.attempts += 1
+        try:
+            result = await request.call()
+        except RetryAfter as exc:
+            if request.attempts > self.max_retries:
+                if not request.future.done():
+                    request.future.set_exception(exc)
+                return
+            retry_after = exc.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            logger.warning(
+                "Telegram asked to retry chat %s after %ss", request.chat_id, retry_after
+            )
+            self.retried += 1
+            bucket = self._bucket(request.chat_id) or self._global
+            bucket.block(float(retry_after))
+            self._enqueue(request)
+        except Exception as exc:
+            if not request.future.done():
+                request.future.set_exception(exc)
+        else:
+            self.sent += 1
+            if not request.future.done():
+                request.future.set_result(result)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Generic, Hashable, Iterable, Tuple, TypeVar
+
+from .database import Assignment
+
+
+T = TypeVar("T")
+
+DEFAULT_RENDER_CACHE_SIZE = 256
+
+# (assignment_id, completed) in display order; ids never change their text, so
+# this is enough to tell whether a rendered view is still current.
+Fingerprint = Tuple[Tuple[int, bool], ...]
+
+
+def completion_fingerprint(assignments: Iterable[Assignment]) -> Fingerprint:
+    return tuple((assignment.id, assignment.completed) for assignment in assignments)
+
+
+def view_key(user_id: int, task_date: date, assignments: Iterable[Assignment]) -> Hashable:
+    return (user_id, task_date, completion_fingerprint(assignments))
+
+
+def content_fingerprint(text: str, keyboard: Any = None) -> str:
+    # Hash of what a message shows, to tell whether an edit would change it.
+    markup = keyboard.to_json() if hasattr(keyboard, "to_json") else repr(keyboard)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(text.encode())
+    digest.update(b"\0")
+    digest.update(markup.encode())
+    return digest.hexdigest()
+
+
+class RenderCache(Generic[T]):
+    # LRU of rendered views. The group message, the personal message and the
+    # reminder for the same state are built once and shared.
+
+    def __init__(self, max_entries: int = DEFAULT_RENDER_CACHE_SIZE):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, T]" = OrderedDict()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], T]) -> T:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+        self.misses += 1
+        value = render()
+        self._entries[key] = value
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -21,6 +21,8 @@ LEVEL_ORDER: Sequence[str] = (
     LEVEL_GENERAL,
 )
 
+LEVEL_RANK: Dict[str, int] = {level: rank for rank, level in enumerate(LEVEL_ORDER)}
+
 
 def get_day_levels(target: date, cfg: SchedulerConfig) -> List[str]:
     weekday = target.weekday()
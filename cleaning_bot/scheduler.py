@@ -1,19 +1,30 @@
 from __future__ import annotations
 
 from datetime import datetime, time
-from typing import Callable
+from typing import Dict, List, Tuple
 
 import pytz
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from .config import SchedulerConfig
 from .dispatcher import (
+    broadcast_to_households,
+    pregenerate_assignments,
+    prune_task_messages,
     send_daily_notifications,
     send_daily_report,
     send_evening_reminders,
 )
 
 
+JOBS = {
+    "daily_tasks": send_daily_notifications,
+    "evening_reminder": send_evening_reminders,
+    "daily_report": send_daily_report,
+    "pregenerate_assignments": pregenerate_assignments,
+}
+
+
 class BotScheduler:
     def __init__(self, cfg: SchedulerConfig):
         timezone = pytz.timezone(cfg.timezone)
@@ -21,34 +32,38 @@ class BotScheduler:
         self._scheduler = AsyncIOScheduler(timezone=timezone)
 
     def start(self, app) -> None:
-        daily_time = _parse_time(self._cfg.daily_notification_time)
-        reminder_time = _parse_time(self._cfg.reminder_time)
-        report_time = _parse_time(self._cfg.report_time)
-        self._scheduler.add_job(
-            send_daily_notifications,
-            trigger="cron",
-            hour=daily_time.hour,
-            minute=daily_time.minute,
-            args=[app],
-            id="daily_tasks",
-            replace_existing=True,
-        )
-        self._scheduler.add_job(
-            send_evening_reminders,
-            trigger="cron",
-            hour=reminder_time.hour,
-            minute=reminder_time.minute,
-            args=[app],
-            id="evening_reminder",
-            replace_existing=True,
-        )
+        # Households due at the same time share one job, which hands them to
+        # the broadcast engine instead of looping over them one by one.
+        tenants = app.bot_data.get("tenants")
+        contexts = tenants.contexts if tenants is not None else (app.bot_data["app_context"],)
+        due: Dict[Tuple[str, str], List] = {}
+        for ctx in contexts:
+            times = ctx.config.scheduler
+            for name, at in (
+                ("daily_tasks", times.daily_notification_time),
+                ("evening_reminder", times.reminder_time),
+                ("daily_report", times.report_time),
+                ("pregenerate_assignments", times.pregenerate_time),
+            ):
+                due.setdefault((name, at), []).append(ctx)
+        for (name, at), targets in due.items():
+            run_at = _parse_time(at)
+            self._scheduler.add_job(
+                broadcast_to_households,
+                trigger="cron",
+                hour=run_at.hour,
+                minute=run_at.minute,
+                args=[app, JOBS[name], targets, f"{name}@{at}"],
+                id=f"{name}@{at}",
+                replace_existing=True,
+            )
         self._scheduler.add_job(
-            send_daily_report,
+            prune_task_messages,
             trigger="cron",
-            hour=report_time.hour,
-            minute=report_time.minute,
+            hour=0,
+            minute=5,
             args=[app],
-            id="daily_report",
+            id="prune_task_messages",
             replace_existing=True,
         )
         self._scheduler.start()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    # Runs at most one call per key at a time; callers arriving while it is in
+    # flight await the same result instead of starting their own. A caller that
+    # gets cancelled does not cancel the shared call.
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        self.started = 0
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(func())
+            self._calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
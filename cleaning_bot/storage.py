@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from .database import DEFAULT_READER_POOL_SIZE
+
+
+T = TypeVar("T")
+
+# Database methods that only read. Everything else is routed to the single
+# writer thread so that commits are serialized without blocking readers.
+READ_METHODS = frozenset(
+    {
+        "list_assignments_for_user",
+        "list_assignments",
+        "get_assignment",
+        "list_incomplete_for_user",
+        "list_incomplete",
+        "list_task_messages",
+        "daily_stats",
+    }
+)
+
+
+class AsyncDatabase:
+    # Awaitable mirror of Database: every public method returns a coroutine that
+    # runs the blocking call on a dedicated thread, so the event loop keeps
+    # serving other updates while SQLite waits on disk.
+
+    def __init__(self, db, *, readers: int = DEFAULT_READER_POOL_SIZE):
+        self.db = db
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self.db, name)
+        if not callable(method):
+            return method
+        executor = self._readers if name in READ_METHODS else self._writer
+
+        async def call(*args, **kwargs):
+            return await self._submit(executor, method, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    async def complete_assignment(self, assignment_id: int, user_id: int):
+        # With group commit enabled the tap waits on the batch future instead of
+        # occupying the writer thread, otherwise taps could never coalesce.
+        batcher = getattr(self.db, "batcher", None)
+        if batcher is None:
+            return await self._submit(
+                self._writer, self.db.complete_assignment, assignment_id, user_id
+            )
+        return await asyncio.wrap_future(batcher.submit(assignment_id, user_id))
+
+    async def run_write(self, func: Callable[..., T], *args, **kwargs) -> T:
+        return await self._submit(self._writer, func, *args, **kwargs)
+
+    async def run_read(self, func: Callable[..., T], *args, **kwargs) -> T:
+        return await self._submit(self._readers, func, *args, **kwargs)
+
+    @staticmethod
+    async def _submit(executor: ThreadPoolExecutor, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - typing helper
+    from .directory import UserDirectory
+    from .dispatcher import AppContext
+
+
+@dataclass(frozen=True)
+class Routes:
+    by_chat: Mapping[int, "AppContext"]
+    by_user: Mapping[int, "AppContext"]
+
+
+class Tenants:
+    # Every household served by the process, found by its group chat or by
+    # one of its members. A chat or a person belongs to exactly one household.
+    # The routes are replaced as a whole when a household reloads its users.
+
+    def __init__(self, contexts: Tuple["AppContext", ...], routes: Routes):
+        self.contexts = contexts
+        self.routes = routes
+
+    @classmethod
+    def build(cls, contexts: Iterable["AppContext"]) -> "Tenants":
+        contexts = tuple(contexts)
+        tenants = cls(contexts, _routes((ctx, ctx.directory) for ctx in contexts))
+        for ctx in contexts:
+            ctx.tenants = tenants
+        return tenants
+
+    @property
+    def by_chat(self) -> Mapping[int, "AppContext"]:
+        return self.routes.by_chat
+
+    @property
+    def by_user(self) -> Mapping[int, "AppContext"]:
+        return self.routes.by_user
+
+    def routes_with(self, ctx: "AppContext", directory: "UserDirectory") -> Routes:
+        # The routes once `ctx` serves `directory`; raises before anything changes.
+        return _routes(
+            (other, directory if other is ctx else other.directory) for other in self.contexts
+        )
+
+    def resolve(
+        self, chat_id: Optional[int] = None, user_id: Optional[int] = None
+    ) -> Optional["AppContext"]:
+        routes = self.routes
+        # The chat decides first: in a group everyone acts for that household.
+        ctx = routes.by_chat.get(chat_id) if chat_id is not None else None
+        if ctx is None and user_id is not None:
+            ctx = routes.by_user.get(user_id)
+        return ctx
+
+
+def _routes(members: Iterable[Tuple["AppContext", "UserDirectory"]]) -> Routes:
+    by_chat = {}
+    by_user = {}
+    for ctx, directory in members:
+        chat_id = ctx.config.bot.group_chat_id
+        if chat_id in by_chat:
+            raise ValueError(
+                f"Chat {chat_id} belongs to households "
+                f"{by_chat[chat_id].household!r} and {ctx.household!r}"
+            )
+        by_chat[chat_id] = ctx
+        for user in directory.users:
+            if user.telegram_id in by_user:
+                raise ValueError(
+                    f"User {user.telegram_id} belongs to households "
+                    f"{by_user[user.telegram_id].household!r} and {ctx.household!r}"
+                )
+            by_user[user.telegram_id] = ctx
+    return Routes(MappingProxyType(by_chat), MappingProxyType(by_user))
@@ -5,7 +5,7 @@ from datetime import date
 from typing import Dict, Iterable, List, Sequence, Tuple
 
 from .database import Assignment
-from .rotation import LEVEL_ORDER
+from .rotation import LEVEL_RANK
 
 
 ROOM_EMOJI: Dict[str, str] = {
@@ -33,7 +33,7 @@ def format_assignments(assignments: Iterable[Assignment]) -> str:
         lines.append(f"\n{emoji} *{room}*")
         ordered = sorted(
             grouped[room],
-            key=lambda item: (LEVEL_ORDER.index(item.level), item.id),
+            key=lambda item: (LEVEL_RANK[item.level], item.id),
         )
         for assignment in ordered:
             lines.append(f"  - {_format_task_line(assignment)}")
@@ -134,8 +134,8 @@ def _highest_level_for_assignments(assignments: Sequence[Assignment]) -> str | N
         return None
 
     try:
-        return max(available, key=LEVEL_ORDER.index)
-    except ValueError as exc:  # pragma: no cover - guard clause
+        return max(available, key=LEVEL_RANK.__getitem__)
+    except KeyError as exc:  # pragma: no cover - guard clause
         raise ValueError("Unknown level in assignments") from exc
 
 
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from .config import WebhookConfig
+
+
+def webhook_options(config: WebhookConfig) -> Dict[str, Any]:
+    # Keyword arguments for Application.run_webhook / Updater.start_webhook.
+    # PTB's tornado server checks the secret token header and feeds updates
+    # into the same queue polling fills, so the handlers run unchanged.
+    from telegram import Update
+
+    return {
+        "listen": config.listen,
+        "port": config.port,
+        "url_path": config.path.lstrip("/"),
+        "webhook_url": config.url,
+        "secret_token": config.secret_token,
+        "allowed_updates": Update.ALL_TYPES,
+    }
@@ -1,9 +1,13 @@
-from datetime import date
+import asyncio
+import threading
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
 
 from cleaning_bot.config import AppConfig, BotConfig, DatabaseConfig, FilesConfig, SchedulerConfig
 from cleaning_bot.data_loaders import TaskMap, User
 from cleaning_bot.database import Database
-from cleaning_bot.dispatcher import AppContext, ensure_assignments_for_date
+from cleaning_bot import dispatcher
+from cleaning_bot.dispatcher import AppContext, ensure_assignments, ensure_assignments_for_date
 
 
 class DummyAppConfig(AppConfig):
@@ -55,3 +59,61 @@ def test_ensure_assignments_idempotent(tmp_path):
     first = ensure_assignments_for_date(ctx, target)
     second = ensure_assignments_for_date(ctx, target)
     assert len(first[1]) == len(second[1])
+
+
+def test_concurrent_callers_share_one_generation_pass(tmp_path, monkeypatch):
+    ctx = build_context(tmp_path)
+    target = date(2024, 1, 6)
+    passes = []
+    inserts = []
+    original_bulk = ctx.db.add_assignments_bulk
+    release = threading.Event()
+
+    def counting_ensure(ctx, target):
+        passes.append(target)
+        release.wait(timeout=5)  # hold the pass open until every caller has arrived
+        return ensure_assignments_for_date(ctx, target)
+
+    def counting_bulk(task_date, planned, **kwargs):
+        inserts.append(task_date)
+        return original_bulk(task_date, planned, **kwargs)
+
+    monkeypatch.setattr(dispatcher, "ensure_assignments_for_date", counting_ensure)
+    monkeypatch.setattr(ctx.db, "add_assignments_bulk", counting_bulk)
+
+    async def scenario():
+        calls = [asyncio.ensure_future(ensure_assignments(ctx, target)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(scenario())
+
+    assert passes == [target]
+    assert inserts == [target]
+    assert ctx.generations.started == 1
+    assert ctx.generations.in_flight() == 0
+    assert all([a.id for a in r[1]] == [a.id for a in results[0][1]] for r in results)
+
+
+def test_pregeneration_creates_upcoming_days_once(tmp_path, monkeypatch):
+    ctx = build_context(tmp_path)
+    today = date(2024, 1, 6)
+    monkeypatch.setattr(dispatcher, "datetime", SimpleNamespace(now=lambda: datetime(2024, 1, 6, 3)))
+    inserts = []
+    original_bulk = ctx.db.add_assignments_bulk
+
+    def counting_bulk(task_date, planned, **kwargs):
+        inserts.append(task_date)
+        return original_bulk(task_date, planned, **kwargs)
+
+    monkeypatch.setattr(ctx.db, "add_assignments_bulk", counting_bulk)
+    app = SimpleNamespace(bot_data={"app_context": ctx})
+
+    asyncio.run(dispatcher.pregenerate_assignments(app))
+    asyncio.run(dispatcher.pregenerate_assignments(app))
+    tomorrow = asyncio.run(ensure_assignments(ctx, today + timedelta(days=1)))
+
+    horizon = ctx.config.scheduler.pregenerate_days
+    assert inserts == [today + timedelta(days=offset) for offset in range(horizon + 1)]
+    assert tomorrow[1]
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from cleaning_bot.batching import CompletionBatcher
+from cleaning_bot.data_loaders import User
+from cleaning_bot.database import COMPLETION_DONE, COMPLETION_FORBIDDEN, Database
+from cleaning_bot.storage import AsyncDatabase
+
+
+def build_db(tmp_path, **kwargs):
+    db = Database(tmp_path / "db.sqlite3", **kwargs)
+    db.sync_users([User(telegram_id=1, name="Аня"), User(telegram_id=2, name="Боря")])
+    created = db.add_assignments_bulk(
+        date(2024, 1, 6),
+        [
+            (user_id, "Кухня", "базовый минимум", f"Задача {n}")
+            for user_id in (1, 2)
+            for n in range(10)
+        ],
+    )
+    return db, created
+
+
+def test_batcher_coalesces_concurrent_requests():
+    batches = []
+
+    def apply(requests):
+        batches.append(list(requests))
+        return [assignment_id for assignment_id, _ in requests]
+
+    batcher = CompletionBatcher(apply, window=0.05)
+    futures = [batcher.submit(i, 1) for i in range(10)]
+
+    assert [future.result(timeout=1) for future in futures] == list(range(10))
+    assert len(batches) == 1
+    assert batcher.requests == 10
+    batcher.close()
+
+
+def test_batcher_isolates_failing_request():
+    def apply(requests):
+        if any(assignment_id == 3 for assignment_id, _ in requests):
+            raise ValueError("broken row")
+        return ["ok" for _ in requests]
+
+    batcher = CompletionBatcher(apply, window=0.05)
+    futures = [batcher.submit(i, 1) for i in range(5)]
+
+    for index, future in enumerate(futures):
+        if index == 3:
+            with pytest.raises(ValueError):
+                future.result(timeout=1)
+        else:
+            assert future.result(timeout=1) == "ok"
+    batcher.close()
+
+
+def test_batcher_flushes_pending_requests_on_close():
+    applied = []
+
+    def apply(requests):
+        time.sleep(0.01)
+        applied.extend(requests)
+        return [None for _ in requests]
+
+    batcher = CompletionBatcher(apply, window=1.0)
+    futures = [batcher.submit(i, 1) for i in range(3)]
+    batcher.close()
+
+    assert all(future.done() for future in futures)
+    assert len(applied) == 3
+    with pytest.raises(RuntimeError):
+        batcher.submit(4, 1)
+
+
+def test_database_group_commits_concurrent_taps(tmp_path):
+    db, created = build_db(tmp_path, completion_batch_window=0.02)
+    results = {}
+    barrier = threading.Barrier(len(created))
+
+    def tap(assignment):
+        barrier.wait()
+        results[assignment.id] = db.complete_assignment(assignment.id, assignment.user_id)
+
+    threads = [threading.Thread(target=tap, args=(a,)) for a in created]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result.status == COMPLETION_DONE for result in results.values())
+    assert db.batcher.requests == len(created)
+    assert db.batcher.batches < len(created)
+    assert db.daily_stats(date(2024, 1, 6), date(2024, 1, 6))[0][3:] == (10, 10)
+    db.close()
+
+
+def test_async_facade_uses_group_commit(tmp_path):
+    db, created = build_db(tmp_path, completion_batch_window=0.02)
+    storage = AsyncDatabase(db)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(storage.complete_assignment(a.id, 1) for a in created)
+        )
+
+    results = asyncio.run(scenario())
+    storage.close()
+
+    statuses = [result.status for result in results]
+    assert statuses.count(COMPLETION_DONE) == 10
+    assert statuses.count(COMPLETION_FORBIDDEN) == 10
+    assert db.batcher.batches <= 2
+    db.close()
+
+
+def test_group_commit_makes_the_writer_durable(tmp_path):
+    batched, _ = build_db(tmp_path / "batched", completion_batch_window=0.005)
+    plain, _ = build_db(tmp_path / "plain")
+
+    # 2 is FULL, 1 is NORMAL
+    with batched.connect() as conn:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    with plain.connect() as conn:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    with batched.read() as conn:
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    batched.close()
+    plain.close()
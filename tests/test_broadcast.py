@@ -0,0 +1,103 @@
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from cleaning_bot import dispatcher
+from cleaning_bot.broadcast import BroadcastEngine
+
+
+def test_concurrency_is_bounded_and_failures_are_isolated():
+    engine = BroadcastEngine(concurrency=3)
+    peak = []
+    sent = []
+
+    async def send(target):
+        peak.append(engine.in_flight)
+        await asyncio.sleep(0.02)
+        if target == 4:
+            raise RuntimeError("chat not found")
+        sent.append(target)
+
+    started = time.perf_counter()
+    summary = asyncio.run(engine.run("morning", range(9), send))
+    elapsed = time.perf_counter() - started
+
+    assert max(peak) == 3
+    assert sorted(sent) == [0, 1, 2, 3, 5, 6, 7, 8]
+    assert (summary.total, summary.succeeded, summary.failed, summary.done) == (9, 8, 1, 9)
+    assert [target for target, _ in summary.failures] == [4]
+    assert engine.progress["morning"] is summary
+    # three waves of three instead of nine sequential sends
+    assert elapsed < 6 * 0.02
+
+
+def test_empty_broadcast_finishes_at_once():
+    summary = asyncio.run(BroadcastEngine().run("nothing", [], None))
+
+    assert (summary.total, summary.done) == (0, 0)
+
+
+def test_rejects_non_positive_concurrency():
+    with pytest.raises(ValueError):
+        BroadcastEngine(concurrency=0)
+
+
+def test_finished_broadcasts_are_trimmed_to_a_bounded_history(monkeypatch):
+    monkeypatch.setattr("cleaning_bot.broadcast.PROGRESS_HISTORY", 2)
+    engine = BroadcastEngine()
+
+    async def send(target):
+        pass
+
+    for n in range(4):
+        asyncio.run(engine.run(f"run-{n}", [n], send))
+
+    assert list(engine.progress) == ["run-2", "run-3"]
+
+
+def test_households_due_together_run_in_one_broadcast(monkeypatch):
+    monkeypatch.setattr(
+        dispatcher, "datetime", SimpleNamespace(now=lambda: datetime(2024, 1, 1, 10, 0))
+    )
+    done = []
+
+    async def job(app, ctx):
+        await asyncio.sleep(0.01)
+        if ctx.household == "broken":
+            raise RuntimeError("database is locked")
+        done.append(ctx.household)
+
+    contexts = [SimpleNamespace(household=name) for name in ("flat", "broken", "dacha")]
+    app = SimpleNamespace(bot_data={"broadcasts": BroadcastEngine(concurrency=2)})
+
+    summary = asyncio.run(dispatcher.broadcast_to_households(app, job, contexts))
+
+    assert sorted(done) == ["dacha", "flat"]
+    assert (summary.name, summary.succeeded, summary.failed) == ("job@2024-01-01T10:00:00", 2, 1)
+
+
+def test_runs_of_one_job_keep_separate_progress(monkeypatch):
+    now = [datetime(2024, 1, 1, 10, 0)]
+    monkeypatch.setattr(dispatcher, "datetime", SimpleNamespace(now=lambda: now[0]))
+    engine = BroadcastEngine()
+    app = SimpleNamespace(bot_data={"broadcasts": engine})
+    contexts = [SimpleNamespace(household="flat")]
+
+    async def job(app, ctx):
+        pass
+
+    async def scenario():
+        first = await dispatcher.broadcast_to_households(app, job, contexts, "daily_tasks@10:00")
+        now[0] = datetime(2024, 1, 2, 10, 0)
+        second = await dispatcher.broadcast_to_households(app, job, contexts, "daily_tasks@10:00")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert engine.progress == {
+        "daily_tasks@10:00@2024-01-01T10:00:00": first,
+        "daily_tasks@10:00@2024-01-02T10:00:00": second,
+    }
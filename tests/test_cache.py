@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+from cleaning_bot.cache import DayAssignmentCache
+from cleaning_bot.database import Assignment
+
+
+def make_assignment(assignment_id, task_date, user_id=1, completed=False):
+    return Assignment(
+        id=assignment_id,
+        task_date=task_date,
+        user_id=user_id,
+        room="Кухня",
+        level="базовый минимум",
+        description=f"Задача {assignment_id}",
+        completed=completed,
+        completed_at=None,
+    )
+
+
+def test_cache_groups_day_by_user():
+    cache = DayAssignmentCache()
+    day = date(2024, 1, 1)
+    cache.put(day, [make_assignment(1, day), make_assignment(2, day, user_id=2)], cache.generation())
+
+    assert [a.id for a in cache.get_day(day)] == [1, 2]
+    assert [a.id for a in cache.get_user(day, 2)] == [2]
+    assert cache.get_user(day, 3) == []
+    assert cache.get_assignment(2).user_id == 2
+
+
+def test_cache_updates_completion_without_touching_returned_objects():
+    cache = DayAssignmentCache()
+    day = date(2024, 1, 1)
+    cache.put(day, [make_assignment(1, day)], cache.generation())
+    before = cache.get_user(day, 1)
+
+    cache.mark_completed(1, datetime(2024, 1, 1, 12, 0))
+
+    assert before[0].completed is False
+    assert cache.get_user(day, 1)[0].completed is True
+    assert cache.get_assignment(1).completed_at == datetime(2024, 1, 1, 12, 0)
+
+
+def test_cache_evicts_least_recently_used_day():
+    cache = DayAssignmentCache(max_days=2)
+    days = [date(2024, 1, d) for d in (1, 2, 3)]
+    cache.put(days[0], [make_assignment(1, days[0])], cache.generation())
+    cache.put(days[1], [make_assignment(2, days[1])], cache.generation())
+    cache.get_day(days[0])
+    cache.put(days[2], [make_assignment(3, days[2])], cache.generation())
+
+    assert cache.get_day(days[1]) is None
+    assert cache.get_assignment(2) is None
+    assert cache.get_day(days[0]) is not None
+    assert cache.get_day(days[2]) is not None
+
+
+def test_cache_expires_old_days():
+    now = [0.0]
+    cache = DayAssignmentCache(max_age=60, clock=lambda: now[0])
+    day = date(2024, 1, 1)
+    cache.put(day, [make_assignment(1, day)], cache.generation())
+
+    now[0] = 30
+    assert cache.get_day(day) is not None
+    now[0] = 61
+    assert cache.get_day(day) is None
+
+
+def test_cache_drops_loads_that_raced_with_a_write():
+    cache = DayAssignmentCache()
+    day = date(2024, 1, 1)
+    generation = cache.generation()
+    cache.mark_completed(1, datetime(2024, 1, 1, 12, 0))
+
+    cache.put(day, [make_assignment(1, day)], generation)
+
+    assert cache.get_day(day) is None
+
+
+def test_cache_limits_days_per_household():
+    cache = DayAssignmentCache(max_days=2)
+    days = [date(2024, 1, d) for d in (1, 2, 3)]
+    households = [f"house-{n}" for n in range(5)]
+    next_id = iter(range(1, 100))
+    for household in households:
+        for day in days[:2]:
+            cache.put((household, day), [make_assignment(next(next_id), day)], cache.generation())
+
+    # more households than max_days, yet every household keeps its two days
+    assert all(
+        cache.get_day((household, day)) is not None for household in households for day in days[:2]
+    )
+
+    cache.put(("house-0", days[2]), [make_assignment(next(next_id), days[2])], cache.generation())
+
+    assert cache.get_day(("house-0", days[0])) is None
+    assert cache.get_day(("house-0", days[2])) is not None
+    assert cache.get_day(("house-1", days[0])) is not None
+
+
+def test_cache_keeps_default_number_of_days_per_household():
+    cache = DayAssignmentCache()
+    days = [date(2024, 1, d) for d in (1, 2, 3, 4)]
+    for n, day in enumerate(days[:3], start=1):
+        cache.put(("flat", day), [make_assignment(n, day)], cache.generation())
+
+    # today and two pre-generated days all stay cached
+    assert all(cache.get_day(("flat", day)) is not None for day in days[:3])
+
+    cache.put(("flat", days[3]), [make_assignment(4, days[3])], cache.generation())
+
+    assert cache.get_day(("flat", days[0])) is None
+    assert all(cache.get_day(("flat", day)) is not None for day in days[1:])
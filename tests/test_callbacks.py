@@ -0,0 +1,26 @@
+from datetime import date
+
+from cleaning_bot.callbacks import MAX_CALLBACK_DATA, CallbackSigner, TaskCallback
+
+
+def test_payload_round_trips_and_fits_telegram_limit():
+    signer = CallbackSigner(b"secret")
+    data = signer.encode(2**31 - 1, 9_999_999_999_999, date(2099, 12, 31))
+
+    assert len(data.encode()) <= MAX_CALLBACK_DATA
+    assert signer.decode(data) == TaskCallback(2**31 - 1, 9_999_999_999_999, date(2099, 12, 31))
+
+
+def test_tampered_or_foreign_payload_is_rejected():
+    signer = CallbackSigner(b"secret")
+    data = signer.encode(5, 1, date(2024, 1, 1))
+    assignment, owner, day, signature = data.split(":")[1:]
+
+    assert signer.decode(f"task_done:{assignment}:2:{day}:{signature}") is None
+    assert CallbackSigner(b"other").decode(data) is None
+    assert signer.decode("task_done:5:1") is None
+    assert signer.decode("task_done:abc") is None
+
+
+def test_unsigned_legacy_payload_is_still_understood():
+    assert CallbackSigner(b"secret").decode("task_done:7") == TaskCallback(7)
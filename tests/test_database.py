@@ -0,0 +1,409 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from cleaning_bot.data_loaders import User
+from cleaning_bot.database import (
+    COMPLETION_ALREADY_DONE,
+    COMPLETION_DONE,
+    COMPLETION_FORBIDDEN,
+    COMPLETION_NOT_FOUND,
+    TASK_MESSAGE_GROUP,
+    TASK_MESSAGE_PERSONAL,
+    Database,
+    TaskMessage,
+    date_to_day,
+    day_to_date,
+)
+
+
+def build_db(tmp_path, **kwargs):
+    db = Database(tmp_path / "db.sqlite3", **kwargs)
+    db.sync_users([User(telegram_id=1, name="Аня")])
+    return db
+
+
+def test_database_uses_wal_and_tuned_pragmas(tmp_path):
+    db = build_db(tmp_path)
+    with db.connect() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    with db.read() as conn:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+    db.close()
+
+
+def test_database_reuses_connections(tmp_path):
+    db = build_db(tmp_path)
+    with db.connect() as first:
+        pass
+    with db.connect() as second:
+        pass
+    assert first is second
+
+    with db.read() as first_reader:
+        pass
+    with db.read() as second_reader:
+        pass
+    assert first_reader is second_reader
+    db.close()
+
+
+def test_readers_see_committed_writes(tmp_path):
+    db = build_db(tmp_path)
+    target = date(2024, 1, 1)
+    assert db.list_assignments(target) == []
+
+    assignment_id = db.add_assignment(target, 1, "Кухня", "базовый минимум", "Помыть пол")
+    db.mark_completed(assignment_id)
+
+    assignments = db.list_assignments(target)
+    assert [a.id for a in assignments] == [assignment_id]
+    assert assignments[0].completed is True
+    db.close()
+
+
+def test_writer_rolls_back_on_error(tmp_path):
+    db = build_db(tmp_path)
+    with pytest.raises(RuntimeError):
+        with db.connect() as conn:
+            conn.execute("INSERT INTO users(telegram_id, name) VALUES(2, 'Боря')")
+            raise RuntimeError("boom")
+
+    with db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+    db.close()
+
+
+def test_reader_pool_is_bounded(tmp_path):
+    db = build_db(tmp_path, readers=2)
+    seen = set()
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        for _ in range(20):
+            with db.read() as conn:
+                seen.add(id(conn))
+                conn.execute("SELECT 1").fetchone()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 1 <= len(seen) <= 2
+    db.close()
+
+
+def test_closed_database_rejects_queries(tmp_path):
+    db = build_db(tmp_path)
+    db.close()
+    with pytest.raises(RuntimeError):
+        db.list_assignments(date(2024, 1, 1))
+
+
+def test_add_assignments_bulk_inserts_day_in_one_call(tmp_path):
+    db = build_db(tmp_path)
+    db.sync_users([User(telegram_id=1, name="Аня"), User(telegram_id=2, name="Боря")])
+    target = date(2024, 1, 6)
+    planned = [
+        (1, "Кухня", "базовый минимум", "Помыть пол"),
+        (1, "Кухня", "обычная уборка", "Разобрать холодильник"),
+        (2, "Ванная", "базовый минимум", "Протереть зеркало"),
+    ]
+
+    created = db.add_assignments_bulk(target, planned)
+
+    assert [(a.user_id, a.room, a.level, a.description) for a in created] == planned
+    assert created == db.list_assignments(target)
+    db.close()
+
+
+def test_add_assignments_bulk_is_idempotent(tmp_path):
+    db = build_db(tmp_path)
+    target = date(2024, 1, 6)
+    planned = [(1, "Кухня", "базовый минимум", "Помыть пол")]
+
+    first = db.add_assignments_bulk(target, planned)
+    second = db.add_assignments_bulk(target, planned)
+
+    assert [a.id for a in first] == [a.id for a in second]
+    db.close()
+
+
+def _captured_queries(db, call):
+    statements = []
+    with db.read() as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        with db.read() as conn:
+            conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def test_hot_queries_do_not_scan_assignments(tmp_path):
+    db = build_db(tmp_path, readers=1)
+    db.sync_users([User(telegram_id=1, name="Аня"), User(telegram_id=2, name="Боря")])
+    for day in range(1, 29):
+        db.add_assignments_bulk(
+            date(2024, 2, day),
+            [
+                (user_id, room, "базовый минимум", f"Задача {n}")
+                for user_id in (1, 2)
+                for room in ("Кухня", "Ванная")
+                for n in range(3)
+            ],
+        )
+    target = date(2024, 2, 10)
+    hot_calls = [
+        lambda: db.list_assignments(target),
+        lambda: db.list_assignments_for_user(target, 1),
+        lambda: db.list_incomplete_for_user(target, 1),
+        lambda: db.list_incomplete(target),
+        lambda: db.get_assignment(1),
+        lambda: db.daily_stats(date(2024, 2, 5), date(2024, 2, 11)),
+        lambda: db.list_task_messages(target),
+    ]
+
+    for call in hot_calls:
+        db.cache.invalidate()
+        queries = _captured_queries(db, call)
+        assert queries
+        with db.read() as conn:
+            for sql in queries:
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                assert not any(detail.startswith("SCAN") for detail in plan), (sql, plan)
+    db.close()
+
+
+def _raw_stats(db, start, end):
+    with db.read() as conn:
+        rows = conn.execute(
+            """
+            SELECT a.user_id, u.name, a.task_date,
+                   SUM(CASE WHEN a.completed=1 THEN 1 ELSE 0 END), COUNT(*)
+            FROM assignments a
+            JOIN users u ON u.telegram_id = a.user_id
+            WHERE a.task_date BETWEEN ? AND ?
+            GROUP BY a.user_id, u.name, a.task_date
+            ORDER BY u.name, a.task_date
+            """,
+            (date_to_day(start), date_to_day(end)),
+        ).fetchall()
+    return [(r[0], r[1], day_to_date(r[2]), r[3], r[4]) for r in rows]
+
+
+def test_daily_stats_rollup_follows_writes(tmp_path):
+    db = build_db(tmp_path)
+    db.sync_users([User(telegram_id=1, name="Аня"), User(telegram_id=2, name="Боря")])
+    first, second = date(2024, 1, 6), date(2024, 1, 7)
+    created = db.add_assignments_bulk(
+        first,
+        [
+            (1, "Кухня", "базовый минимум", "Помыть пол"),
+            (1, "Кухня", "обычная уборка", "Разобрать холодильник"),
+            (2, "Ванная", "базовый минимум", "Протереть зеркало"),
+        ],
+    )
+    db.add_assignment(second, 2, "Ванная", "базовый минимум", "Протереть зеркало")
+    db.mark_completed(created[0].id)
+    db.mark_completed(created[0].id)  # repeated taps must not double count
+
+    assert db.daily_stats(first, second) == [
+        (1, "Аня", first, 1, 2),
+        (2, "Боря", first, 0, 1),
+        (2, "Боря", second, 0, 1),
+    ]
+    assert db.daily_stats(first, second) == _raw_stats(db, first, second)
+
+    with db.connect() as conn:
+        conn.execute("DELETE FROM assignments WHERE task_date=?", (date_to_day(second),))
+    assert db.daily_stats(first, second) == _raw_stats(db, first, second)
+    db.close()
+
+
+def test_assignments_are_stored_in_compact_form(tmp_path):
+    db = build_db(tmp_path)
+    target = date(2024, 1, 6)
+    assignment_id = db.add_assignment(target, 1, "Кухня", "обычная уборка", "Помыть пол")
+    db.mark_completed(assignment_id)
+
+    with db.read() as conn:
+        row = conn.execute(
+            "SELECT typeof(a.task_date), a.task_date, typeof(t.level), t.level,"
+            " typeof(a.completed_at)"
+            " FROM assignments a JOIN task_catalog t ON t.id = a.task_id WHERE a.id=?",
+            (assignment_id,),
+        ).fetchone()
+    assert tuple(row) == ("integer", 19728, "integer", 2, "integer")
+
+    assignment = db.get_assignment(assignment_id)
+    assert assignment.task_date == target
+    assert assignment.level == "обычная уборка"
+    assert assignment.completed_at is not None
+    db.close()
+
+
+def test_unknown_level_is_rejected(tmp_path):
+    db = build_db(tmp_path)
+    with pytest.raises(ValueError):
+        db.add_assignment(date(2024, 1, 6), 1, "Кухня", "обычная", "Помыть пол")
+    db.close()
+
+
+def test_task_catalog_deduplicates_descriptions(tmp_path):
+    db = build_db(tmp_path)
+    tasks = {"Кухня": {"базовый минимум": ["Помыть пол"], "обычная уборка": ["Помыть пол"]}}
+    db.sync_task_catalog(tasks)
+    db.sync_task_catalog(tasks)
+    for day in range(1, 8):
+        db.add_assignments_bulk(
+            date(2024, 1, day),
+            [
+                (1, "Кухня", "базовый минимум", "Помыть пол"),
+                (1, "Кухня", "обычная уборка", "Помыть пол"),
+            ],
+        )
+
+    with db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM task_catalog").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM assignments").fetchone()[0] == 14
+    assert [a.level for a in db.list_assignments(date(2024, 1, 3))] == [
+        "базовый минимум",
+        "обычная уборка",
+    ]
+    db.close()
+
+
+def test_task_catalog_cache_survives_rollback(tmp_path):
+    db = build_db(tmp_path)
+    target = date(2024, 1, 6)
+    with pytest.raises(RuntimeError):
+        with db.connect() as conn:
+            db._resolve_task_ids(conn, [("Кухня", "базовый минимум", "Помыть пол")])
+            raise RuntimeError("boom")
+
+    db.add_assignment(target, 1, "Кухня", "базовый минимум", "Помыть пол")
+    assert [a.description for a in db.list_assignments(target)] == ["Помыть пол"]
+    db.close()
+
+
+def test_day_cache_serves_repeated_reads_and_follows_completions(tmp_path):
+    db = build_db(tmp_path, readers=1)
+    target = date(2024, 1, 6)
+    created = db.add_assignments_bulk(
+        target,
+        [
+            (1, "Кухня", "базовый минимум", "Помыть пол"),
+            (1, "Кухня", "обычная уборка", "Разобрать холодильник"),
+        ],
+    )
+
+    queries = _captured_queries(
+        db,
+        lambda: (
+            db.list_assignments(target),
+            db.list_assignments_for_user(target, 1),
+            db.get_assignment(created[0].id),
+        ),
+    )
+    assert queries == []
+
+    db.mark_completed(created[0].id)
+    queries = []
+    with db.read() as conn:
+        conn.set_trace_callback(queries.append)
+    assert [a.completed for a in db.list_assignments_for_user(target, 1)] == [True, False]
+    assert [a.id for a in db.list_incomplete_for_user(target, 1)] == [created[1].id]
+    assert db.get_assignment(created[0].id).completed_at is not None
+    with db.read() as conn:
+        conn.set_trace_callback(None)
+    assert queries == []
+
+    db.cache.invalidate()
+    assert [a.completed for a in db.list_assignments(target)] == [True, False]
+    db.close()
+
+
+def test_list_incomplete_returns_open_tasks_for_everyone(tmp_path):
+    db = build_db(tmp_path)
+    db.sync_users([User(telegram_id=1, name="Аня"), User(telegram_id=2, name="Боря")])
+    target = date(2024, 1, 6)
+    created = db.add_assignments_bulk(
+        target,
+        [
+            (2, "Ванная", "базовый минимум", "Протереть зеркало"),
+            (1, "Кухня", "базовый минимум", "Помыть пол"),
+            (1, "Кухня", "обычная уборка", "Разобрать холодильник"),
+        ],
+    )
+    db.add_assignments_bulk(target + timedelta(days=1), [(1, "Кухня", "базовый минимум", "Помыть пол")])
+    done = next(a for a in created if a.description == "Помыть пол")
+    db.mark_completed(done.id)
+
+    expected = [(1, "Разобрать холодильник"), (2, "Протереть зеркало")]
+    assert [(a.user_id, a.description) for a in db.list_incomplete(target)] == expected
+    db.cache.invalidate()
+    assert [(a.user_id, a.description) for a in db.list_incomplete(target)] == expected
+    db.close()
+
+
+def test_complete_assignment_checks_owner_and_returns_day(tmp_path):
+    db = build_db(tmp_path)
+    db.sync_users([User(telegram_id=1, name="Аня"), User(telegram_id=2, name="Боря")])
+    target = date(2024, 1, 6)
+    created = db.add_assignments_bulk(
+        target,
+        [
+            (1, "Кухня", "базовый минимум", "Помыть пол"),
+            (1, "Кухня", "обычная уборка", "Разобрать холодильник"),
+            (2, "Ванная", "базовый минимум", "Протереть зеркало"),
+        ],
+    )
+    first = created[0].id
+
+    assert db.complete_assignment(first, 2).status == COMPLETION_FORBIDDEN
+    assert db.complete_assignment(999, 1).status == COMPLETION_NOT_FOUND
+    assert db.get_assignment(first).completed is False
+
+    result = db.complete_assignment(first, 1)
+    assert result.status == COMPLETION_DONE
+    assert result.assignment.id == first and result.assignment.completed
+    assert [(a.id, a.completed) for a in result.assignments] == [
+        (first, True),
+        (created[1].id, False),
+    ]
+    assert db.list_assignments_for_user(target, 1) == result.assignments
+
+    again = db.complete_assignment(first, 1)
+    assert again.status == COMPLETION_ALREADY_DONE
+    assert again.assignment.completed_at == result.assignment.completed_at
+    assert db.daily_stats(target, target)[0][3] == 1
+    db.close()
+
+
+def test_task_messages_survive_reopen_and_are_pruned(tmp_path):
+    db = build_db(tmp_path)
+    today = date(2024, 1, 10)
+    db.save_task_message(TaskMessage(TASK_MESSAGE_GROUP, today, 1, -100, 5))
+    db.save_task_message(TaskMessage(TASK_MESSAGE_GROUP, today, 1, -100, 6))
+    db.save_task_message(TaskMessage(TASK_MESSAGE_PERSONAL, today, 1, 1, 7))
+    db.save_task_message(TaskMessage(TASK_MESSAGE_GROUP, today - timedelta(days=5), 1, -100, 1))
+    db.close()
+
+    db = Database(tmp_path / "db.sqlite3")
+    recent = db.list_task_messages(today - timedelta(days=1))
+    assert [(m.kind, m.chat_id, m.message_id) for m in recent] == [
+        (TASK_MESSAGE_GROUP, -100, 6),
+        (TASK_MESSAGE_PERSONAL, 1, 7),
+    ]
+    assert db.prune_task_messages(today - timedelta(days=3)) == 1
+    db.delete_task_message(TASK_MESSAGE_PERSONAL, today, 1)
+    assert [m.message_id for m in db.list_task_messages(date(2000, 1, 1))] == [6]
+    db.close()
@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from cleaning_bot.data_loaders import User, load_users
+from cleaning_bot.directory import UserDirectory
+from cleaning_bot.dispatcher import AppContext
+
+
+def test_directory_indexes_users_and_admins():
+    users = [
+        User(telegram_id=3, name="Оля", household="dacha"),
+        User(telegram_id=1, name="Настя"),
+        User(telegram_id=2, name="Андрей"),
+    ]
+
+    directory = UserDirectory.build(users, admin_ids=[2, 5])
+
+    assert directory.by_id[1].name == "Настя"
+    assert directory.name_of(3) == "Оля"
+    assert directory.name_of(42) == ""
+    assert directory.is_admin(2) and not directory.is_admin(1) and not directory.is_admin(None)
+    with pytest.raises(TypeError):
+        directory.by_id[4] = users[0]
+
+
+def test_reload_swaps_in_a_new_directory():
+    config = SimpleNamespace(bot=SimpleNamespace(token="token", admin_ids=[1]))
+    synced = []
+    db = SimpleNamespace(sync_users=synced.extend)
+    ctx = AppContext(config=config, db=db, users=[User(1, "Настя")], tasks={})
+    before = ctx.directory
+
+    ctx.reload_users([User(1, "Настя"), User(2, "Андрей")])
+
+    assert before.name_of(2) == ""
+    assert ctx.directory.name_of(2) == "Андрей"
+    assert [u.telegram_id for u in ctx.users] == [1, 2]
+    assert ctx.directory.is_admin(1)
+    assert [u.telegram_id for u in synced] == [1, 2]
+
+
+def test_load_users_puts_everyone_in_the_files_household(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(
+        json.dumps([{"id": 1, "name": "Настя"}, {"id": 2, "name": "Оля", "household": "dacha"}]),
+        encoding="utf-8",
+    )
+
+    assert [u.household for u in load_users(path, "dacha")] == ["dacha", "dacha"]
+    with pytest.raises(ValueError):
+        load_users(path)
@@ -1,12 +1,32 @@
 import asyncio
 import sys
+import time
 from datetime import date, datetime
 from types import ModuleType, SimpleNamespace
 
 
+def _prepare_context(app_ctx):
+    from cleaning_bot.callbacks import CallbackSigner
+    from cleaning_bot.data_loaders import User
+    from cleaning_bot.directory import UserDirectory
+    from cleaning_bot.render import RenderCache
+    from cleaning_bot.singleflight import SingleFlight
+    from cleaning_bot.storage import AsyncDatabase
+
+    app_ctx.storage = AsyncDatabase(getattr(app_ctx, "db", None))
+    users = [User(telegram_id=u.telegram_id, name=u.name) for u in getattr(app_ctx, "users", [])]
+    admin_ids = getattr(getattr(getattr(app_ctx, "config", None), "bot", None), "admin_ids", ())
+    app_ctx.directory = UserDirectory.build(users, admin_ids)
+    app_ctx.generations = SingleFlight()
+    app_ctx.views = RenderCache()
+    app_ctx.callbacks = CallbackSigner(b"secret")
+    app_ctx.household = "default"
+    return app_ctx
+
+
 def _build_context(app_ctx):
-    application = SimpleNamespace(bot_data={"app_context": app_ctx})
-    return SimpleNamespace(application=application)
+    application = SimpleNamespace(bot_data={"app_context": _prepare_context(app_ctx)})
+    return SimpleNamespace(application=application, args=[])
 
 
 def _stub_parse_mode(monkeypatch):
@@ -19,15 +39,27 @@ def _stub_parse_mode(monkeypatch):
     class DummyError(Exception):
         pass
 
+    class DummyRetryAfter(DummyError):
+        def __init__(self, retry_after):
+            super().__init__(f"Retry in {retry_after}")
+            self.retry_after = retry_after
+
     error_module.TelegramError = DummyError
     error_module.BadRequest = DummyError
+    error_module.RetryAfter = DummyRetryAfter
     telegram_module.error = error_module
     monkeypatch.setitem(sys.modules, "telegram.constants", constants_module)
     monkeypatch.setitem(sys.modules, "telegram.error", error_module)
     monkeypatch.setitem(sys.modules, "telegram", telegram_module)
 
 from cleaning_bot import dispatcher
-from cleaning_bot.database import Assignment
+from cleaning_bot.database import (
+    COMPLETION_ALREADY_DONE,
+    COMPLETION_DONE,
+    COMPLETION_FORBIDDEN,
+    Assignment,
+    CompletionResult,
+)
 
 
 def test_welcome_on_group_mention_triggers_welcome(monkeypatch):
@@ -76,20 +108,18 @@ def test_tasks_command_private_sends_personal_summary(monkeypatch):
     _stub_parse_mode(monkeypatch)
 
     def fake_ensure(ctx, target):  # noqa: ARG001
-        return {42: ["assignment"]}
+        return {42: [SimpleNamespace(id=1, completed=False)]}
 
     monkeypatch.setattr(dispatcher, "ensure_assignments_for_date", fake_ensure)
     monkeypatch.setattr(
         dispatcher, "build_personal_message", lambda a, d, **kwargs: "personal"
     )
-    monkeypatch.setattr(dispatcher, "build_keyboard", lambda a: "keyboard")
-    monkeypatch.setattr(
-        dispatcher,
-        "_store_personal_task_message",
-        lambda app, day, user_id, message: stored.update(
-            {"app": app, "date": day, "user_id": user_id, "message": message}
-        ),
-    )
+    monkeypatch.setattr(dispatcher, "build_reminder_message", lambda a: "reminder")
+    monkeypatch.setattr(dispatcher, "build_keyboard", lambda a, **kwargs: "keyboard")
+    async def store_personal(app, day, user_id, message, **kwargs):
+        stored.update({"app": app, "date": day, "user_id": user_id, "message": message})
+
+    monkeypatch.setattr(dispatcher, "_store_personal_task_message", store_personal)
 
     async def reply_text(text, **kwargs):
         captured["text"] = text
@@ -112,6 +142,35 @@ def test_tasks_command_private_sends_personal_summary(monkeypatch):
     assert stored["message"].message_id == 777
 
 
+def test_tasks_command_accepts_tomorrow(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    monkeypatch.setattr(dispatcher, "datetime", SimpleNamespace(now=lambda: datetime(2024, 1, 1)))
+    requested = []
+
+    def fake_ensure(ctx, target):
+        requested.append(target)
+        return {}
+
+    monkeypatch.setattr(dispatcher, "ensure_assignments_for_date", fake_ensure)
+    replies = []
+
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    update = SimpleNamespace(
+        effective_message=SimpleNamespace(reply_text=reply_text),
+        effective_chat=SimpleNamespace(type="private"),
+        effective_user=SimpleNamespace(id=42),
+    )
+    context = _build_context(SimpleNamespace(users=[], config=None))
+    context.args = ["Завтра"]
+
+    asyncio.run(dispatcher.tasks_command(update, context))
+
+    assert requested == [date(2024, 1, 2)]
+    assert replies == ["На завтра для тебя нет назначенных задач."]
+
+
 def test_tasks_command_group_sends_personal_blocks(monkeypatch):
     calls = []
     _stub_parse_mode(monkeypatch)
@@ -132,7 +191,10 @@ def test_tasks_command_group_sends_personal_blocks(monkeypatch):
         return SimpleNamespace(chat_id=-100, message_id=len(calls))
 
     users = [SimpleNamespace(telegram_id=1, name="Настя"), SimpleNamespace(telegram_id=2, name="Андрей")]
-    app_ctx = SimpleNamespace(users=users, config=None)
+    saved = []
+    app_ctx = SimpleNamespace(
+        users=users, config=None, db=SimpleNamespace(save_task_message=saved.append)
+    )
     update = SimpleNamespace(
         effective_message=SimpleNamespace(reply_text=reply_text),
         effective_chat=SimpleNamespace(type="group"),
@@ -147,6 +209,10 @@ def test_tasks_command_group_sends_personal_blocks(monkeypatch):
     assert calls[0][0] == "*Настя*\npersonal"
     assert calls[1][0] == "*Андрей*\npersonal"
     assert calls[0][1]["reply_markup"] == "keyboard-1"
+    assert [(m.kind, m.user_id, m.message_id) for m in saved] == [
+        ("group", 1, 1),
+        ("group", 2, 2),
+    ]
 
 
 def test_tasks_command_group_handles_empty(monkeypatch):
@@ -232,13 +298,39 @@ def test_build_personal_message_reports_no_tasks_when_all_done():
     assert "Помыть пол" not in text
 
 
+def test_group_block_and_refresh_share_one_render(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    renders = []
+
+    def fake_personal(assignments, task_date, **kwargs):
+        renders.append([a.completed for a in assignments])
+        return "personal"
+
+    monkeypatch.setattr(dispatcher, "build_personal_message", fake_personal)
+    monkeypatch.setattr(dispatcher, "build_reminder_message", lambda a: "reminder")
+    monkeypatch.setattr(dispatcher, "build_keyboard", lambda a, **kwargs: None)
+    day = date(2024, 1, 1)
+    pending = Assignment(1, day, 1, "Кухня", "базовый минимум", "Помыть пол", False, None)
+    app_ctx = _prepare_context(SimpleNamespace(users=[SimpleNamespace(telegram_id=1, name="Настя")]))
+
+    blocks = dispatcher.build_group_blocks(app_ctx, {1: [pending]}, day)
+    view = dispatcher._render_task_view(app_ctx, day, 1, [pending])
+    done = dispatcher._render_task_view(
+        app_ctx, day, 1, [Assignment(1, day, 1, "Кухня", "базовый минимум", "Помыть пол", True, None)]
+    )
+
+    assert blocks[0].text == view.group_text == "*Настя*\npersonal"
+    assert done is not view
+    assert renders == [[False], [True]]
+
+
 def test_send_daily_notifications_posts_greeting_and_blocks(monkeypatch):
     _stub_parse_mode(monkeypatch)
 
     app_ctx = SimpleNamespace(
         users=[SimpleNamespace(telegram_id=1, name="Настя")],
         config=SimpleNamespace(bot=SimpleNamespace(group_chat_id=-100)),
-        db=SimpleNamespace(),
+        db=SimpleNamespace(save_task_message=lambda message: None),
     )
 
     monkeypatch.setattr(
@@ -258,7 +350,7 @@ def test_send_daily_notifications_posts_greeting_and_blocks(monkeypatch):
         return SimpleNamespace(chat_id=kwargs["chat_id"], message_id=len(sent))
 
     app = SimpleNamespace(
-        bot_data={"app_context": app_ctx},
+        bot_data={"app_context": _prepare_context(app_ctx)},
         bot=SimpleNamespace(send_message=fake_send_message),
     )
 
@@ -294,7 +386,7 @@ def test_send_daily_notifications_handles_empty_assignments(monkeypatch):
         return SimpleNamespace(chat_id=kwargs.get("chat_id", 0), message_id=len(sent))
 
     app = SimpleNamespace(
-        bot_data={"app_context": app_ctx},
+        bot_data={"app_context": _prepare_context(app_ctx)},
         bot=SimpleNamespace(send_message=fake_send_message),
     )
 
@@ -314,22 +406,20 @@ def test_send_evening_reminders_store_personal_message(monkeypatch):
         SimpleNamespace(now=lambda: datetime(2024, 1, 1)),
     )
 
-    assignments = [SimpleNamespace(id=1)]
+    assignments = [SimpleNamespace(id=1, user_id=1, completed=False)]
 
     class FakeDB:
-        def list_incomplete_for_user(self, task_date, user_id):
+        def list_incomplete(self, task_date, household):
             assert task_date == today
-            if user_id == 1:
-                return assignments
-            return []
+            return assignments
 
     monkeypatch.setattr(dispatcher, "format_levels_line", lambda items: "levels")
     monkeypatch.setattr(dispatcher, "format_assignments", lambda items: "assignments")
-    monkeypatch.setattr(dispatcher, "build_keyboard", lambda items: "keyboard")
+    monkeypatch.setattr(dispatcher, "build_keyboard", lambda items, **kwargs: "keyboard")
 
     stored = {}
 
-    def store_personal(app, day, user_id, message):
+    async def store_personal(app, day, user_id, message, **kwargs):
         stored["app"] = app
         stored["date"] = day
         stored["user_id"] = user_id
@@ -344,16 +434,17 @@ def test_send_evening_reminders_store_personal_message(monkeypatch):
         return SimpleNamespace(chat_id=kwargs["chat_id"], message_id=100 + len(sent))
 
     app_ctx = SimpleNamespace(
-        users=[SimpleNamespace(telegram_id=1, name="Настя")],
+        users=[SimpleNamespace(telegram_id=1, name="Настя"), SimpleNamespace(telegram_id=2, name="Андрей")],
         db=FakeDB(),
     )
     app = SimpleNamespace(
-        bot_data={"app_context": app_ctx},
+        bot_data={"app_context": _prepare_context(app_ctx)},
         bot=SimpleNamespace(send_message=fake_send_message),
     )
 
     asyncio.run(dispatcher.send_evening_reminders(app))
 
+    assert len(sent) == 1
     assert sent[0]["chat_id"] == 1
     assert sent[0]["reply_markup"] == "keyboard"
     assert stored["user_id"] == 1
@@ -361,12 +452,58 @@ def test_send_evening_reminders_store_personal_message(monkeypatch):
     assert stored["message"].message_id == 101
 
 
+def test_send_evening_reminders_sends_concurrently_and_isolates_failures(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    monkeypatch.setattr(dispatcher, "datetime", SimpleNamespace(now=lambda: datetime(2024, 1, 1)))
+    monkeypatch.setattr(dispatcher, "format_levels_line", lambda items: "")
+    monkeypatch.setattr(dispatcher, "format_assignments", lambda items: "assignments")
+    monkeypatch.setattr(dispatcher, "build_keyboard", lambda items, **kwargs: None)
+    stored = []
+
+    async def store_personal(app, day, user_id, message, **kwargs):
+        stored.append(user_id)
+
+    monkeypatch.setattr(dispatcher, "_store_personal_task_message", store_personal)
+    users = [SimpleNamespace(telegram_id=user_id, name=str(user_id)) for user_id in range(1, 7)]
+    queries = []
+
+    class FakeDB:
+        def list_incomplete(self, task_date, household):
+            queries.append(task_date)
+            return [
+                SimpleNamespace(id=user.telegram_id, user_id=user.telegram_id, completed=False)
+                for user in users
+            ]
+
+    delay = 0.05
+
+    async def fake_send_message(**kwargs):
+        await asyncio.sleep(delay)
+        if kwargs["chat_id"] == 3:
+            raise RuntimeError("bot was blocked by the user")
+        return SimpleNamespace(chat_id=kwargs["chat_id"], message_id=1)
+
+    app_ctx = SimpleNamespace(users=users, db=FakeDB())
+    app = SimpleNamespace(
+        bot_data={"app_context": _prepare_context(app_ctx)},
+        bot=SimpleNamespace(send_message=fake_send_message),
+    )
+
+    started = time.perf_counter()
+    asyncio.run(dispatcher.send_evening_reminders(app))
+    elapsed = time.perf_counter() - started
+
+    assert len(queries) == 1
+    assert sorted(stored) == [1, 2, 4, 5, 6]
+    assert elapsed < 3 * delay
+
+
 def test_send_daily_report_uses_formatter(monkeypatch):
     _stub_parse_mode(monkeypatch)
 
     rows = [("ignored",)]
     app_ctx = SimpleNamespace(
-        db=SimpleNamespace(daily_stats=lambda start, end: rows),
+        db=SimpleNamespace(daily_stats=lambda start, end, household: rows),
         config=SimpleNamespace(bot=SimpleNamespace(group_chat_id=-100)),
     )
 
@@ -379,7 +516,7 @@ def test_send_daily_report_uses_formatter(monkeypatch):
         return SimpleNamespace(chat_id=kwargs.get("chat_id", 0), message_id=len(sent))
 
     app = SimpleNamespace(
-        bot_data={"app_context": app_ctx},
+        bot_data={"app_context": _prepare_context(app_ctx)},
         bot=SimpleNamespace(send_message=fake_send_message),
     )
 
@@ -396,7 +533,7 @@ def test_stats_command_uses_daily_stats(monkeypatch):
     monkeypatch.setattr(dispatcher, "format_stats", lambda label, r, mode: f"{label}:{mode}")
 
     class FakeDB:
-        def daily_stats(self, start, end):  # noqa: ARG002
+        def daily_stats(self, start, end, household):  # noqa: ARG002
             return rows
 
     app_ctx = SimpleNamespace(db=FakeDB(), users=[], config=None)
@@ -407,6 +544,7 @@ def test_stats_command_uses_daily_stats(monkeypatch):
     update = SimpleNamespace(
         effective_message=SimpleNamespace(reply_text=reply_text),
         effective_chat=SimpleNamespace(type="private"),
+        effective_user=SimpleNamespace(id=1),
     )
     context = _build_context(app_ctx)
 
@@ -441,23 +579,18 @@ def test_on_task_completed_updates_group_message(monkeypatch):
         def __init__(self):
             self.completed = []
 
-        def get_assignment(self, assignment_id):
-            assert assignment_id == 1
-            return assignment
-
-        def mark_completed(self, assignment_id):
+        def complete_assignment(self, assignment_id, user_id):
+            assert user_id == 1
             self.completed.append(assignment_id)
             assignment.completed = True
-
-        def list_assignments_for_user(self, task_date, user_id):
-            assert task_date == today
-            assert user_id == 1
-            return [assignment]
+            return CompletionResult(
+                status=COMPLETION_DONE, assignment=assignment, assignments=[assignment]
+            )
 
     monkeypatch.setattr(
         dispatcher, "build_personal_message", lambda a, d, **kwargs: "updated"
     )
-    monkeypatch.setattr(dispatcher, "build_keyboard", lambda a: "keyboard")
+    monkeypatch.setattr(dispatcher, "build_keyboard", lambda a, **kwargs: "keyboard")
 
     edited = {}
 
@@ -502,7 +635,7 @@ def test_on_task_completed_updates_group_message(monkeypatch):
     }
     update = SimpleNamespace(callback_query=query)
 
-    asyncio.run(dispatcher.on_task_completed(update, context))
+    asyncio.run(_complete_and_drain(update, context))
 
     assert answers[0] == (None, {})
     assert edited["text"] == "*Настя*\nupdated"
@@ -521,28 +654,17 @@ def test_on_task_completed_updates_group_message(monkeypatch):
 def test_on_task_completed_rejects_foreign_tasks(monkeypatch):
     _stub_parse_mode(monkeypatch)
 
-    today = date(2024, 1, 1)
     monkeypatch.setattr(
         dispatcher,
         "datetime",
         SimpleNamespace(now=lambda: datetime(2024, 1, 1)),
     )
 
-    assignment = Assignment(
-        id=1,
-        task_date=today,
-        user_id=1,
-        room="Кухня",
-        level="базовый минимум",
-        description="Проверить мусор",
-        completed=False,
-        completed_at=None,
-    )
-
     class FakeDB:
-        def get_assignment(self, assignment_id):
+        def complete_assignment(self, assignment_id, user_id):
             assert assignment_id == 1
-            return assignment
+            assert user_id == 2
+            return CompletionResult(status=COMPLETION_FORBIDDEN)
 
     answers = []
 
@@ -576,3 +698,278 @@ def test_on_task_completed_rejects_foreign_tasks(monkeypatch):
     asyncio.run(dispatcher.on_task_completed(update, context))
 
     assert answers == [("Эта задача закреплена за другим участником.", {"show_alert": True})]
+
+
+def test_on_task_completed_ignores_repeated_taps(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+
+    class FakeDB:
+        def complete_assignment(self, assignment_id, user_id):
+            return CompletionResult(status=COMPLETION_ALREADY_DONE)
+
+    answers = []
+
+    async def answer(text=None, **kwargs):
+        answers.append((text, kwargs))
+
+    async def edit_message_text(**kwargs):  # pragma: no cover - should not be called
+        raise AssertionError("edit_message_text should not be called")
+
+    query = SimpleNamespace(
+        data="task_done:1",
+        from_user=SimpleNamespace(id=1),
+        message=None,
+        answer=answer,
+        edit_message_text=edit_message_text,
+    )
+    context = _build_context(SimpleNamespace(db=FakeDB(), users=[]))
+
+    asyncio.run(dispatcher.on_task_completed(SimpleNamespace(callback_query=query), context))
+
+    assert answers == [("Задача уже отмечена как выполненная.", {})]
+
+
+async def _complete_and_drain(update, context):
+    await dispatcher.on_task_completed(update, context)
+    await dispatcher._edit_scheduler(context.application).drain()
+
+
+def _completion_fixture(monkeypatch, delay, *, fail_tapped_edit=False):
+    today = date(2024, 1, 1)
+    assignment = Assignment(
+        id=1,
+        task_date=today,
+        user_id=1,
+        room="Кухня",
+        level="базовый минимум",
+        description="Проверить мусор",
+        completed=True,
+        completed_at=None,
+    )
+
+    class FakeDB:
+        def complete_assignment(self, assignment_id, user_id):
+            return CompletionResult(
+                status=COMPLETION_DONE, assignment=assignment, assignments=[assignment]
+            )
+
+    monkeypatch.setattr(dispatcher, "build_personal_message", lambda a, d, **kwargs: "updated")
+    monkeypatch.setattr(dispatcher, "build_keyboard", lambda a, **kwargs: None)
+
+    edits = []
+
+    async def slow_edit(**kwargs):
+        await asyncio.sleep(delay)
+        edits.append(kwargs.get("message_id", "tapped"))
+
+    async def tapped_edit(**kwargs):
+        await asyncio.sleep(delay)
+        if fail_tapped_edit:
+            raise RuntimeError("Message is not modified")
+        edits.append("tapped")
+
+    async def answer(text=None, **kwargs):
+        pass
+
+    message = SimpleNamespace(
+        text="*Настя*\nстарый текст",
+        chat=SimpleNamespace(type="group", id=-100),
+        message_id=123,
+    )
+    query = SimpleNamespace(
+        data="task_done:1",
+        from_user=SimpleNamespace(id=1),
+        message=message,
+        answer=answer,
+        edit_message_text=tapped_edit,
+    )
+    app_ctx = SimpleNamespace(db=FakeDB(), users=[SimpleNamespace(telegram_id=1, name="Настя")])
+    context = _build_context(app_ctx)
+    context.application.bot = SimpleNamespace(edit_message_text=slow_edit)
+    context.application.bot_data["group_task_messages"] = {
+        (today.isoformat(), 1): dispatcher.GroupTaskMessage(chat_id=-200, message_id=555)
+    }
+    context.application.bot_data["personal_task_messages"] = {
+        (today.isoformat(), 1): dispatcher.PersonalTaskMessage(chat_id=1, message_id=999)
+    }
+    return SimpleNamespace(callback_query=query), context, edits
+
+
+def test_on_task_completed_refreshes_messages_concurrently(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    delay = 0.1
+    update, context, edits = _completion_fixture(monkeypatch, delay)
+
+    started = time.perf_counter()
+    asyncio.run(_complete_and_drain(update, context))
+    latency = time.perf_counter() - started
+
+    assert sorted(edits, key=str) == [555, 999, "tapped"]
+    # three sequential round trips would take 3 * delay
+    assert latency < 2 * delay
+
+
+def test_on_task_completed_isolates_failed_edits(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    update, context, edits = _completion_fixture(monkeypatch, 0.01, fail_tapped_edit=True)
+
+    asyncio.run(_complete_and_drain(update, context))
+
+    assert sorted(edits) == [555, 999]
+
+
+def test_on_task_completed_skips_edits_that_change_nothing(monkeypatch):
+    from cleaning_bot.render import content_fingerprint
+
+    _stub_parse_mode(monkeypatch)
+    update, context, edits = _completion_fixture(monkeypatch, 0)
+    group_ref = context.application.bot_data["group_task_messages"][("2024-01-01", 1)]
+    group_ref.fingerprint = content_fingerprint("*Настя*\nupdated", None)
+
+    async def not_modified(**kwargs):
+        raise sys.modules["telegram.error"].BadRequest("Message is not modified")
+
+    context.application.bot.edit_message_text = not_modified
+
+    asyncio.run(_complete_and_drain(update, context))
+
+    scheduler = dispatcher._edit_scheduler(context.application)
+    assert edits == ["tapped"]
+    assert (scheduler.sent, scheduler.unchanged) == (1, 2)
+    # "not modified" means the message is current, so it stays tracked
+    personal_ref = context.application.bot_data["personal_task_messages"][("2024-01-01", 1)]
+    assert personal_ref.fingerprint == content_fingerprint("updated", None)
+
+
+def test_only_uneditable_messages_are_forgotten(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    update, context, edits = _completion_fixture(monkeypatch, 0)
+    errors = sys.modules["telegram.error"]
+    deleted = []
+    context.application.bot_data["app_context"].db.delete_task_message = (
+        lambda kind, day, user_id: deleted.append(kind)
+    )
+
+    async def failing_edit(**kwargs):
+        if kwargs["chat_id"] == -200:
+            raise errors.TelegramError("Timed out")
+        raise errors.BadRequest("Message to edit not found")
+
+    context.application.bot.edit_message_text = failing_edit
+
+    asyncio.run(_complete_and_drain(update, context))
+
+    bot_data = context.application.bot_data
+    # a timeout keeps the group message for the next refresh
+    assert ("2024-01-01", 1) in bot_data["group_task_messages"]
+    assert ("2024-01-01", 1) not in bot_data["personal_task_messages"]
+    assert deleted == [dispatcher.TASK_MESSAGE_PERSONAL]
+
+
+def test_on_task_completed_rejects_foreign_and_stale_taps_without_database(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    monkeypatch.setattr(dispatcher, "datetime", SimpleNamespace(now=lambda: datetime(2024, 1, 10)))
+    answers = []
+
+    class FakeDB:
+        def complete_assignment(self, assignment_id, user_id):
+            raise AssertionError("the database must not be touched")
+
+    async def answer(text=None, **kwargs):
+        answers.append(text)
+
+    app_ctx = SimpleNamespace(
+        db=FakeDB(),
+        users=[],
+        config=SimpleNamespace(database=SimpleNamespace(task_message_days=3)),
+    )
+    context = _build_context(app_ctx)
+    signer = app_ctx.callbacks
+    for data in [
+        signer.encode(1, 2, date(2024, 1, 10)),  # someone else's task
+        signer.encode(1, 1, date(2024, 1, 1)),  # a long gone day
+        signer.encode(1, 1, date(2024, 1, 10))[:-1] + "x",  # forged
+    ]:
+        query = SimpleNamespace(
+            data=data, from_user=SimpleNamespace(id=1), message=None, answer=answer
+        )
+        asyncio.run(dispatcher.on_task_completed(SimpleNamespace(callback_query=query), context))
+
+    assert answers == [
+        "Эта задача закреплена за другим участником.",
+        "Кнопка устарела. Запроси задачи заново командой /tasks.",
+        "Кнопка устарела. Запроси задачи заново командой /tasks.",
+    ]
+
+
+def test_on_task_completed_coalesces_burst_of_taps(monkeypatch):
+    _stub_parse_mode(monkeypatch)
+    update, context, edits = _completion_fixture(monkeypatch, 0)
+    context.application.bot_data["edit_scheduler"] = dispatcher.EditScheduler(window=0.05)
+    texts = iter(f"state {n}" for n in range(5))
+    monkeypatch.setattr(dispatcher, "build_personal_message", lambda a, d, **kwargs: next(texts))
+    sent = []
+
+    async def tapped_edit(**kwargs):
+        sent.append(kwargs["text"])
+
+    update.callback_query.edit_message_text = tapped_edit
+    done = []
+
+    def complete_assignment(assignment_id, user_id):
+        # every tap completes another task, so each one renders a new state
+        done.append(
+            Assignment(len(done) + 1, date(2024, 1, 1), 1, "Кухня", "базовый минимум", "", True, None)
+        )
+        return CompletionResult(status=COMPLETION_DONE, assignment=done[-1], assignments=list(done))
+
+    context.application.bot_data["app_context"].db.complete_assignment = complete_assignment
+
+    async def burst():
+        for _ in range(5):
+            await dispatcher.on_task_completed(update, context)
+        await dispatcher._edit_scheduler(context.application).drain()
+
+    asyncio.run(burst())
+
+    # first tap goes out at once, the rest collapse into the final state
+    assert sent == ["*Настя*\nstate 0", "*Настя*\nstate 4"]
+    assert edits.count(555) == 2
+    assert edits.count(999) == 2
+
+
+def test_task_messages_are_restored_after_restart_and_pruned(tmp_path, monkeypatch):
+    from cleaning_bot.database import Database, TaskMessage
+
+    now = [datetime(2024, 1, 10)]
+    monkeypatch.setattr(dispatcher, "datetime", SimpleNamespace(now=lambda: now[0]))
+    db = Database(tmp_path / "db.sqlite3")
+    for kind, day, chat_id, message_id in [
+        ("group", 10, -100, 5),
+        ("personal", 10, 1, 7),
+        ("group", 8, -100, 3),
+        ("group", 1, -100, 1),
+    ]:
+        db.save_task_message(TaskMessage(kind, date(2024, 1, day), 1, chat_id, message_id))
+
+    app_ctx = SimpleNamespace(
+        db=db, config=SimpleNamespace(database=SimpleNamespace(task_message_days=3))
+    )
+    app = SimpleNamespace(bot_data={"app_context": _prepare_context(app_ctx)})
+
+    asyncio.run(dispatcher.load_task_messages(app))
+
+    assert app.bot_data["group_task_messages"] == {
+        ("2024-01-08", 1): dispatcher.GroupTaskMessage(chat_id=-100, message_id=3),
+        ("2024-01-10", 1): dispatcher.GroupTaskMessage(chat_id=-100, message_id=5),
+    }
+    assert app.bot_data["personal_task_messages"] == {
+        ("2024-01-10", 1): dispatcher.PersonalTaskMessage(chat_id=1, message_id=7),
+    }
+
+    now[0] = datetime(2024, 1, 12)
+    asyncio.run(dispatcher.prune_task_messages(app))
+
+    assert list(app.bot_data["group_task_messages"]) == [("2024-01-10", 1)]
+    assert [m.message_id for m in db.list_task_messages(date(2000, 1, 1))] == [5, 7]
+    db.close()
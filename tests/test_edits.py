@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+from cleaning_bot.edits import UNCHANGED, EditScheduler
+
+
+def test_first_edit_is_sent_immediately():
+    scheduler = EditScheduler(window=10)
+    sent = []
+
+    async def edit():
+        sent.append(time.perf_counter())
+
+    async def scenario():
+        started = time.perf_counter()
+        assert await scheduler.schedule(1, 10, edit) is True
+        return started
+
+    started = asyncio.run(scenario())
+
+    assert len(sent) == 1
+    assert sent[0] - started < 1
+
+
+def test_burst_collapses_to_latest_state():
+    scheduler = EditScheduler(window=0.05)
+    sent = []
+
+    def edit(text):
+        async def run():
+            sent.append(text)
+
+        return run
+
+    async def scenario():
+        waiters = [scheduler.schedule(1, 10, edit(f"state {n}")) for n in range(5)]
+        await asyncio.sleep(0.01)
+        waiters += [scheduler.schedule(1, 10, edit(f"late {n}")) for n in range(3)]
+        await scheduler.drain()
+        return [waiter.result() for waiter in waiters]
+
+    results = asyncio.run(scenario())
+
+    assert sent == ["state 4", "late 2"]
+    assert results == [True] * 8
+    assert scheduler.sent == 2
+    assert scheduler.coalesced == 6
+
+
+def test_edits_within_window_are_spaced_out():
+    window = 0.05
+    scheduler = EditScheduler(window=window)
+    sent = []
+
+    async def edit():
+        sent.append(time.perf_counter())
+
+    async def scenario():
+        scheduler.schedule(1, 10, edit)
+        await asyncio.sleep(0)
+        scheduler.schedule(1, 10, edit)
+        await scheduler.drain()
+
+    asyncio.run(scenario())
+
+    assert len(sent) == 2
+    assert sent[1] - sent[0] >= window * 0.9
+
+
+def test_different_messages_do_not_wait_for_each_other():
+    scheduler = EditScheduler(window=10)
+    sent = []
+
+    def edit(key):
+        async def run():
+            await asyncio.sleep(0.05)
+            sent.append(key)
+
+        return run
+
+    async def scenario():
+        for message_id in range(5):
+            scheduler.schedule(1, message_id, edit(message_id))
+        started = time.perf_counter()
+        await scheduler.drain()
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(scenario())
+
+    assert sorted(sent) == [0, 1, 2, 3, 4]
+    assert elapsed < 0.2
+
+
+def test_failed_edit_reports_error_and_next_state_still_goes_out():
+    scheduler = EditScheduler(window=0.01)
+    errors = []
+    sent = []
+
+    async def broken():
+        raise RuntimeError("Message to edit not found")
+
+    async def working():
+        sent.append("ok")
+
+    async def scenario():
+        first = scheduler.schedule(1, 10, broken, on_error=errors.append)
+        await asyncio.sleep(0)
+        second = scheduler.schedule(1, 10, working)
+        await scheduler.drain()
+        return first.result(), second.result()
+
+    assert asyncio.run(scenario()) == (False, True)
+    assert [str(exc) for exc in errors] == ["Message to edit not found"]
+    assert sent == ["ok"]
+
+
+def test_unchanged_edit_is_counted_and_does_not_hold_the_window():
+    scheduler = EditScheduler(window=10)
+    sent = []
+
+    async def unchanged():
+        return UNCHANGED
+
+    async def edit():
+        sent.append("edit")
+
+    async def scenario():
+        assert await scheduler.schedule(1, 10, unchanged) is True
+        await asyncio.wait_for(scheduler.schedule(1, 10, edit), timeout=1)
+
+    asyncio.run(scenario())
+
+    assert sent == ["edit"]
+    assert (scheduler.sent, scheduler.unchanged) == (1, 1)
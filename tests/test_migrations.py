@@ -0,0 +1,158 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+from cleaning_bot.database import Database
+from cleaning_bot.migrations import MIGRATIONS, Migration, main, migrate, schema_version
+
+
+LATEST = MIGRATIONS[-1].version
+
+
+def _create_legacy_database(path):
+    # Schema as it was created before versioned migrations existed.
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE users (telegram_id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_date TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            room TEXT NOT NULL,
+            level TEXT NOT NULL,
+            description TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            completed_at TEXT,
+            UNIQUE(task_date, user_id, room, level, description),
+            FOREIGN KEY(user_id) REFERENCES users(telegram_id)
+        );
+        INSERT INTO users VALUES (1, 'Аня');
+        INSERT INTO assignments(task_date, user_id, room, level, description, completed, completed_at)
+        VALUES ('2024-01-06', 1, 'Кухня', 'базовый минимум', 'Помыть пол', 1, '2024-01-06T10:00:00'),
+               ('2024-01-06', 1, 'Кухня', 'обычная уборка', 'Разобрать холодильник', 0, NULL);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_new_database_is_at_latest_version(tmp_path):
+    db = Database(tmp_path / "db.sqlite3")
+    with db.read() as conn:
+        assert schema_version(conn) == LATEST
+        # the household lives on users only, assignment rows stay compact
+        assert "household" in {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        assert "household" not in {row[1] for row in conn.execute("PRAGMA table_info(assignments)")}
+    db.close()
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    path = tmp_path / "db.sqlite3"
+    _create_legacy_database(path)
+
+    db = Database(path)
+    target = date(2024, 1, 6)
+
+    assert db.daily_stats(target, target) == [(1, "Аня", target, 1, 2)]
+    assignments = db.list_assignments(target)
+    assert [(a.level, a.completed) for a in assignments] == [
+        ("базовый минимум", True),
+        ("обычная уборка", False),
+    ]
+    assert assignments[0].completed_at == datetime(2024, 1, 6, 10, 0)
+    assert assignments[1].completed_at is None
+    with db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM task_catalog").fetchone()[0] == 2
+    with db.read() as conn:
+        assert schema_version(conn) == LATEST
+    db.close()
+
+
+def test_failed_migration_rolls_back_step(tmp_path):
+    conn = sqlite3.connect(tmp_path / "db.sqlite3")
+
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    steps = list(MIGRATIONS) + [Migration(LATEST + 1, "broken step", broken)]
+    with pytest.raises(RuntimeError):
+        migrate(conn, steps)
+
+    assert schema_version(conn) == LATEST
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "half_done" not in tables
+    assert "assignments" in tables
+    conn.close()
+
+
+def test_step_applied_by_another_process_is_skipped(tmp_path, monkeypatch):
+    import cleaning_bot.migrations as migrations
+
+    path = tmp_path / "db.sqlite3"
+    steps = [
+        Migration(1, "create table", lambda conn: conn.execute("CREATE TABLE t (id INTEGER)")),
+        Migration(2, "add column", lambda conn: conn.execute("ALTER TABLE t ADD COLUMN note TEXT")),
+    ]
+    first = sqlite3.connect(path)
+    second = sqlite3.connect(path)
+    pending_migrations = migrations.pending_migrations
+
+    def racing(conn, migrations=steps):
+        pending = pending_migrations(conn, migrations)
+        if conn is first:
+            # the other process starts at the same moment and wins the lock
+            migrate(second, migrations)
+        return pending
+
+    monkeypatch.setattr(migrations, "pending_migrations", racing)
+
+    assert migrate(first, steps) == []
+    assert schema_version(first) == 2
+    first.close()
+    second.close()
+
+
+def test_dry_run_reports_without_changing_schema(tmp_path, capsys):
+    path = tmp_path / "db.sqlite3"
+    _create_legacy_database(path)
+
+    main([str(path), "--dry-run"])
+
+    output = capsys.readouterr().out
+    assert f"Would apply {LATEST}:" in output
+    conn = sqlite3.connect(path)
+    assert schema_version(conn) == 0
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "daily_user_stats" not in tables
+    conn.close()
+
+
+def test_newer_schema_is_rejected(tmp_path):
+    conn = sqlite3.connect(tmp_path / "db.sqlite3")
+    conn.execute(f"PRAGMA user_version = {LATEST + 1}")
+    with pytest.raises(RuntimeError):
+        migrate(conn)
+    conn.close()
+
+
+def test_migrations_are_ordered():
+    versions = [migration.version for migration in MIGRATIONS]
+    assert versions == list(range(1, len(MIGRATIONS) + 1))
+
+
+def test_unknown_legacy_level_stops_upgrade(tmp_path):
+    path = tmp_path / "db.sqlite3"
+    _create_legacy_database(path)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE assignments SET level='обычная' WHERE id=2")
+    conn.commit()
+
+    with pytest.raises(ValueError):
+        migrate(conn)
+
+    assert schema_version(conn) == 3
+    assert conn.execute("SELECT level FROM assignments WHERE id=2").fetchone()[0] == "обычная"
+    conn.close()
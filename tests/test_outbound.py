@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+from telegram.error import RetryAfter
+
+from cleaning_bot.outbound import (
+    PRIORITY_BROADCAST,
+    PRIORITY_INTERACTIVE,
+    OutboundQueue,
+    TokenBucket,
+)
+
+
+def test_token_bucket_refills_over_time():
+    now = [0.0]
+    bucket = TokenBucket(2, 2, clock=lambda: now[0])
+
+    bucket.take()
+    bucket.take()
+    assert bucket.delay() == pytest.approx(0.5)
+
+    now[0] = 0.5
+    assert bucket.delay() == 0
+    bucket.block(3)
+    assert bucket.delay() == pytest.approx(3)
+    assert not bucket.idle()
+
+
+def test_interactive_requests_overtake_broadcasts():
+    queue = OutboundQueue(global_rate=100)
+    order = []
+
+    def call(name):
+        async def run():
+            order.append(name)
+            return name
+
+        return run
+
+    async def scenario():
+        sends = [
+            queue.send(-1, call(f"broadcast {n}"), priority=PRIORITY_BROADCAST) for n in range(3)
+        ]
+        sends.append(queue.send(5, call("reply"), priority=PRIORITY_INTERACTIVE))
+        return await asyncio.gather(*sends)
+
+    results = asyncio.run(scenario())
+
+    assert order[0] == "reply"
+    assert order[1:] == ["broadcast 0", "broadcast 1", "broadcast 2"]
+    assert results == ["broadcast 0", "broadcast 1", "broadcast 2", "reply"]
+
+
+def test_per_chat_limit_does_not_hold_back_other_chats():
+    queue = OutboundQueue(private_rate=20, private_burst=1)
+    sent = []
+
+    def call(chat_id):
+        async def run():
+            sent.append((chat_id, time.perf_counter()))
+
+        return run
+
+    async def scenario():
+        started = time.perf_counter()
+        await asyncio.gather(*(queue.send(1, call(1)) for _ in range(3)), queue.send(2, call(2)))
+        return started
+
+    started = asyncio.run(scenario())
+
+    chat_one = [at for chat_id, at in sent if chat_id == 1]
+    chat_two = [at for chat_id, at in sent if chat_id == 2]
+    assert chat_one[2] - chat_one[0] >= 2 / 20 * 0.9
+    assert chat_two[0] - started < 0.04
+
+
+def test_retry_after_pauses_chat_and_retries():
+    queue = OutboundQueue()
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.perf_counter())
+        if len(attempts) == 1:
+            raise RetryAfter(0.05)
+        return "sent"
+
+    assert asyncio.run(queue.send(7, flaky)) == "sent"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.045
+    assert queue.retried == 1
+
+
+def test_gives_up_after_max_retries():
+    queue = OutboundQueue(max_retries=2)
+    attempts = []
+
+    async def always_limited():
+        attempts.append(1)
+        raise RetryAfter(0.001)
+
+    with pytest.raises(RetryAfter):
+        asyncio.run(queue.send(7, always_limited))
+    assert len(attempts) == 3
+
+
+def test_other_errors_reach_the_caller():
+    queue = OutboundQueue()
+
+    async def broken():
+        raise RuntimeError("chat not found")
+
+    with pytest.raises(RuntimeError, match="chat not found"):
+        asyncio.run(queue.send(7, broken))
@@ -0,0 +1,50 @@
+from datetime import date
+
+import pytest
+
+from cleaning_bot.database import Assignment
+from cleaning_bot.render import RenderCache, view_key
+
+
+def _assignment(assignment_id, completed=False):
+    return Assignment(
+        assignment_id, date(2024, 1, 1), 1, "Кухня", "базовый минимум", "Помыть пол", completed, None
+    )
+
+
+def test_same_state_is_rendered_once():
+    cache = RenderCache()
+    renders = []
+    key = view_key(1, date(2024, 1, 1), [_assignment(1), _assignment(2)])
+    same = view_key(1, date(2024, 1, 1), [_assignment(1), _assignment(2)])
+
+    first = cache.get_or_render(key, lambda: renders.append(1) or "view")
+    second = cache.get_or_render(same, lambda: renders.append(2) or "other")
+
+    assert first == second == "view"
+    assert renders == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_completion_changes_the_key():
+    day = date(2024, 1, 1)
+
+    assert view_key(1, day, [_assignment(1)]) != view_key(1, day, [_assignment(1, completed=True)])
+    assert view_key(1, day, [_assignment(1)]) != view_key(2, day, [_assignment(1)])
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RenderCache(max_entries=2)
+    cache.get_or_render("a", lambda: 1)
+    cache.get_or_render("b", lambda: 2)
+    cache.get_or_render("a", lambda: 0)
+    cache.get_or_render("c", lambda: 3)
+
+    assert len(cache) == 2
+    assert cache.get_or_render("a", lambda: 0) == 1
+    assert cache.get_or_render("b", lambda: 0) == 0
+
+
+def test_rejects_empty_cache():
+    with pytest.raises(ValueError):
+        RenderCache(max_entries=0)
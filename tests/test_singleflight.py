@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from cleaning_bot.singleflight import SingleFlight
+
+
+def test_failure_reaches_every_waiter_and_next_call_runs_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database is locked")
+
+    async def ok():
+        calls.append(2)
+        return "done"
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(flight.run("day", broken) for _ in range(3)), return_exceptions=True
+        )
+        return results, await flight.run("day", ok)
+
+    results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "done"
+    assert calls == [1, 2]
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("day", slow))
+        second = asyncio.ensure_future(flight.run("day", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 42
+    assert flight.started == 1
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+from datetime import date
+
+from cleaning_bot.data_loaders import User
+from cleaning_bot.database import Database
+from cleaning_bot.storage import AsyncDatabase
+
+
+class SlowDB:
+    def __init__(self):
+        self.threads = {}
+
+    def mark_completed(self, assignment_id):
+        self.threads.setdefault("mark_completed", set()).add(threading.current_thread().name)
+        time.sleep(0.05)
+        return assignment_id
+
+    def list_assignments(self, task_date):
+        self.threads.setdefault("list_assignments", set()).add(threading.current_thread().name)
+        time.sleep(0.05)
+        return [task_date]
+
+
+def test_async_database_does_not_block_event_loop():
+    storage = AsyncDatabase(SlowDB())
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    async def scenario():
+        return await asyncio.gather(storage.mark_completed(7), ticker())
+
+    result, _ = asyncio.run(scenario())
+    storage.close()
+
+    assert result == 7
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.05
+
+
+def test_async_database_routes_reads_and_writes_to_separate_threads():
+    db = SlowDB()
+    storage = AsyncDatabase(db, readers=3)
+
+    async def scenario():
+        writes = [storage.mark_completed(i) for i in range(3)]
+        reads = [storage.list_assignments(date(2024, 1, 1)) for _ in range(3)]
+        return await asyncio.gather(*writes, *reads)
+
+    started = time.perf_counter()
+    results = asyncio.run(scenario())
+    elapsed = time.perf_counter() - started
+    storage.close()
+
+    assert results[:3] == [0, 1, 2]
+    assert len(db.threads["mark_completed"]) == 1
+    assert all(name.startswith("db-writer") for name in db.threads["mark_completed"])
+    assert all(name.startswith("db-reader") for name in db.threads["list_assignments"])
+    # three serialized writes dominate; the reads overlap with them
+    assert elapsed < 0.3
+
+
+def test_async_database_wraps_real_database(tmp_path):
+    db = Database(tmp_path / "db.sqlite3")
+    storage = AsyncDatabase(db)
+    target = date(2024, 1, 6)
+
+    async def scenario():
+        await storage.sync_users([User(telegram_id=1, name="Аня")])
+        await storage.add_assignments_bulk(target, [(1, "Кухня", "базовый минимум", "Помыть пол")])
+        return await storage.list_assignments(target)
+
+    assignments = asyncio.run(scenario())
+    storage.close()
+    db.close()
+
+    assert [a.description for a in assignments] == ["Помыть пол"]
@@ -0,0 +1,170 @@
+from datetime import date
+
+import pytest
+
+from cleaning_bot.config import HouseholdConfig, household_config, load_config
+from cleaning_bot.data_loaders import User
+from cleaning_bot.dispatcher import AppContext, ensure_assignments_for_date
+from cleaning_bot.tenancy import Tenants
+
+from test_assignments import build_context
+
+
+def _household(household_id, chat_id, tmp_path):
+    return HouseholdConfig(
+        id=household_id,
+        group_chat_id=chat_id,
+        users=tmp_path / f"{household_id}.json",
+        tasks=tmp_path / "tasks.json",
+        rotation_start=date(2024, 1, 1),
+        daily_notification_time="10:00",
+        reminder_time="18:00",
+        report_time="22:00",
+    )
+
+
+def _contexts(tmp_path):
+    base = build_context(tmp_path)
+    members = {
+        "flat": [User(1, "Аня", "flat")],
+        "dacha": [User(2, "Оля", "dacha"), User(3, "Петя", "dacha")],
+    }
+    base.db.sync_users([user for users in members.values() for user in users])
+    return [
+        AppContext(
+            config=household_config(base.config, _household(household_id, chat_id, tmp_path)),
+            db=base.db,
+            users=members[household_id],
+            tasks=base.tasks,
+            household=household_id,
+        )
+        for household_id, chat_id in (("flat", -1), ("dacha", -2))
+    ]
+
+
+def test_contexts_are_resolved_by_chat_then_by_user(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    tenants = Tenants.build([flat, dacha])
+
+    assert tenants.resolve(chat_id=-2, user_id=1) is dacha
+    assert tenants.resolve(chat_id=1, user_id=1) is flat
+    assert tenants.resolve(chat_id=-100, user_id=99) is None
+
+
+def test_one_person_cannot_live_in_two_households(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    dacha.reload_users([User(1, "Аня", "dacha")])
+
+    with pytest.raises(ValueError):
+        Tenants.build([flat, dacha])
+
+
+def test_reloading_users_reroutes_people(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    tenants = Tenants.build([flat, dacha])
+
+    dacha.reload_users([User(2, "Оля", "dacha"), User(4, "Вика", "dacha")])
+    flat.reload_users([User(1, "Аня", "flat"), User(3, "Петя", "flat")])
+
+    assert tenants.resolve(user_id=4) is dacha
+    assert tenants.resolve(user_id=3) is flat
+    assert tenants.resolve(chat_id=-2, user_id=3) is dacha
+
+
+def test_reload_that_would_share_a_person_changes_nothing(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    tenants = Tenants.build([flat, dacha])
+
+    with pytest.raises(ValueError):
+        flat.reload_users([User(1, "Аня", "flat"), User(2, "Оля", "flat")])
+
+    assert [user.telegram_id for user in flat.users] == [1]
+    assert tenants.resolve(user_id=2) is dacha
+
+
+def test_reloaded_members_get_and_see_their_tasks(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    Tenants.build([flat, dacha])
+    target = date(2024, 1, 6)
+
+    flat.reload_users([User(99, "Вика")])
+    generated = ensure_assignments_for_date(flat, target)
+    flat.db.cache.invalidate()
+
+    assert set(generated) == {99}
+    assert {a.user_id for a in flat.db.list_assignments(target, household="flat")} == {99}
+    assert {a.user_id for a in flat.db.list_incomplete(target, household="flat")} == {99}
+    assert flat.db.list_assignments(target, household="default") == []
+
+
+def test_per_user_reads_ignore_other_households_cached_days(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    target = date(2024, 1, 6)
+    dacha_day = ensure_assignments_for_date(dacha, target)
+    (dacha_user,) = dacha_day
+    flat.db.cache.invalidate()
+    # a cached day of the default household that does not list dacha people
+    flat.db.sync_users([User(7, "Гость")])
+    flat.db.add_assignments_bulk(target, [(7, "Кухня", "базовый минимум", "Задача 1")])
+
+    assert flat.db.list_assignments_for_user(target, dacha_user) == dacha_day[dacha_user]
+    assert flat.db.list_incomplete_for_user(target, dacha_user) == dacha_day[dacha_user]
+
+
+def test_households_generate_and_list_their_own_days(tmp_path):
+    flat, dacha = _contexts(tmp_path)
+    target = date(2024, 1, 6)
+
+    flat_day = ensure_assignments_for_date(flat, target)
+    dacha_day = ensure_assignments_for_date(dacha, target)
+    flat.db.cache.invalidate()
+
+    # one room for two people: the rotation gives it to one of them
+    assert set(flat_day) == {1}
+    assert len(dacha_day) == 1 and set(dacha_day) <= {2, 3}
+    assert {a.user_id for a in flat.db.list_assignments(target, household="flat")} == {1}
+    assert {a.user_id for a in flat.db.list_incomplete(target, household="dacha")} == set(dacha_day)
+    assert [row[0] for row in flat.db.daily_stats(target, target, household="dacha")] == list(dacha_day)
+
+
+def test_config_lists_households_with_fallbacks(tmp_path, monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    path = tmp_path / "config.yaml"
+    path.write_text(
+        """
+bot:
+  admin_ids: [1]
+scheduler:
+  rotation_start: "2024-01-01"
+  daily_notification_time: "10:00"
+households:
+  - id: flat
+    group_chat_id: -1
+    users: flat.json
+  - id: dacha
+    group_chat_id: -2
+    rotation_start: "2024-02-05"
+    daily_notification_time: "09:00"
+""",
+        encoding="utf-8",
+    )
+
+    cfg = load_config(path)
+    flat, dacha = cfg.households
+
+    assert (flat.id, flat.group_chat_id, str(flat.users)) == ("flat", -1, "flat.json")
+    assert flat.daily_notification_time == "10:00"
+    assert (dacha.rotation_start, dacha.daily_notification_time) == (date(2024, 2, 5), "09:00")
+    scoped = household_config(cfg, dacha)
+    assert scoped.bot.group_chat_id == -2
+    assert scoped.scheduler.rotation_start == date(2024, 2, 5)
+
+
+def test_config_without_households_keeps_a_single_default_one(tmp_path, monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    path = tmp_path / "config.yaml"
+    path.write_text("bot:\n  group_chat_id: -5\n", encoding="utf-8")
+
+    (household,) = load_config(path).households
+
+    assert (household.id, household.group_chat_id) == ("default", -5)
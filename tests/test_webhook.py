@@ -0,0 +1,183 @@
+import asyncio
+import json
+import socket
+import time
+
+from telegram.ext import Application, CallbackQueryHandler
+from telegram.request import BaseRequest
+
+from cleaning_bot.config import WebhookConfig
+from cleaning_bot.webhook import webhook_options
+
+SECRET = "s3cret-token"
+
+# recorded from a real tap on a task button
+CALLBACK_UPDATE = {
+    "update_id": 100,
+    "callback_query": {
+        "id": "4382",
+        "from": {"id": 1, "is_bot": False, "first_name": "Настя"},
+        "message": {
+            "message_id": 555,
+            "date": 1704103200,
+            "chat": {"id": -100, "type": "supergroup", "title": "Дом"},
+            "text": "Настя\nЗадачи на 01.01.2024",
+        },
+        "chat_instance": "-1",
+        "data": "task_done:1",
+    },
+}
+
+
+class OfflineRequest(BaseRequest):
+    # Answers the Bot API calls made while starting a webhook without the network.
+    def __init__(self):
+        self.methods = []
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        name = url.rsplit("/", 1)[-1]
+        self.methods.append(name)
+        if name == "getMe":
+            result = {"id": 42, "is_bot": True, "first_name": "Bot", "username": "cleaning_bot"}
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _post(reader, writer, body, *, secret=SECRET, path="/telegram"):
+    writer.write(
+        (
+            f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode()
+        + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.decode("latin-1").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return int(head.split()[1])
+
+
+def _webhook_app(calls, request):
+    application = (
+        Application.builder()
+        .token("42:token")
+        .request(request)
+        .get_updates_request(OfflineRequest())
+        .build()
+    )
+
+    async def on_task_completed(update, context):
+        calls.append((update.update_id, update.callback_query.data, time.perf_counter()))
+
+    application.add_handler(CallbackQueryHandler(on_task_completed, pattern=r"^task_done:"))
+    return application
+
+
+async def _serve(calls, request, scenario):
+    application = _webhook_app(calls, request)
+    config = WebhookConfig(
+        enabled=True,
+        port=_free_port(),
+        url="https://bot.example/telegram",
+        secret_token=SECRET,
+    )
+    async with application:
+        await application.start()
+        await application.updater.start_webhook(**webhook_options(config))
+        reader, writer = await asyncio.open_connection("127.0.0.1", config.port)
+        try:
+            return await scenario(reader, writer)
+        finally:
+            writer.close()
+            await application.updater.stop()
+            await application.stop()
+
+
+async def _wait_for(calls, count):
+    while len(calls) < count:
+        await asyncio.sleep(0.001)
+
+
+def test_webhook_options_map_the_config():
+    config = WebhookConfig(
+        enabled=True,
+        listen="0.0.0.0",
+        port=8443,
+        path="/telegram",
+        url="https://bot.example/telegram",
+        secret_token=SECRET,
+    )
+
+    options = webhook_options(config)
+
+    assert options["listen"] == "0.0.0.0"
+    assert options["port"] == 8443
+    assert options["url_path"] == "telegram"
+    assert options["webhook_url"] == "https://bot.example/telegram"
+    assert options["secret_token"] == SECRET
+
+
+def test_posted_updates_reach_the_registered_handler_quickly():
+    calls = []
+    request = OfflineRequest()
+
+    async def scenario(reader, writer):
+        latencies = []
+        for n in range(20):
+            body = json.dumps({**CALLBACK_UPDATE, "update_id": n}).encode()
+            started = time.perf_counter()
+            assert await _post(reader, writer, body) == 200
+            await asyncio.wait_for(_wait_for(calls, n + 1), timeout=5)
+            latencies.append(calls[-1][2] - started)
+        return latencies
+
+    latencies = asyncio.run(_serve(calls, request, scenario))
+
+    assert [(update_id, data) for update_id, data, _ in calls] == [
+        (n, "task_done:1") for n in range(20)
+    ]
+    assert "setWebhook" in request.methods
+    # one keep-alive connection, no polling interval in between
+    assert max(latencies) < 0.5
+
+
+def test_requests_without_the_secret_never_reach_the_handler():
+    calls = []
+
+    async def scenario(reader, writer):
+        body = json.dumps(CALLBACK_UPDATE).encode()
+        statuses = [
+            await _post(reader, writer, body, secret="wrong"),
+            await _post(reader, writer, body, path="/other"),
+            await _post(reader, writer, body),
+        ]
+        await asyncio.wait_for(_wait_for(calls, 1), timeout=5)
+        return statuses
+
+    statuses = asyncio.run(_serve(calls, OfflineRequest(), scenario))
+
+    assert statuses == [403, 404, 200]
+    assert [update_id for update_id, _, _ in calls] == [100]